@@ -0,0 +1,203 @@
+"""
+Batch runner: pushes a file of goals through N isolated agent workers that share
+one OCR pool and one rate-limited LLM pool, then writes per-goal results and an
+aggregate throughput/latency report.
+
+Goals file: one goal per line (blank lines and '#' comments are skipped).
+
+Usage:
+    python batch.py goals.txt --workers 8 --backend sim
+    python batch.py goals.txt --workers 4 --backend x11 --display-base 1 --rpm 120
+"""
+import argparse
+import contextlib
+import io
+import json
+import queue
+import threading
+import time
+from main import OmniAgent
+from core.brain import Planner, LLMClient
+from core.vision import Eye, PerceptionEngine, OCRProcessor
+from core.motor import XdotoolHand
+from core.pool import OCRPool, LLMPool
+from core.budget import StepBudget
+from core.simulator import build_demo_desktop, SimEye, SimHand, SimOCR, ScriptedLLMClient, SilentVoice
+from simulate import summarize, percentile
+
+
+def load_goals(path):
+    with open(path) as f:
+        lines = [line.strip() for line in f]
+    return [line for line in lines if line and not line.startswith('#')]
+
+
+class BatchRunner:
+    def __init__(self, make_agent, workers=4, max_steps=20):
+        """
+        make_agent(worker_id) -> OmniAgent, called once per goal inside the worker
+        thread (mss and friends are not safe to share across threads).
+        """
+        self.make_agent = make_agent
+        self.workers = workers
+        self.max_steps = max_steps
+        self.results = []
+        self._lock = threading.Lock()
+
+    def _run_goal(self, worker_id, goal):
+        record = {'goal': goal, 'worker': worker_id, 'status': 'error', 'steps': []}
+        start = time.time()
+        try:
+            agent = self.make_agent(worker_id)
+            steps = agent.run(goal, max_steps=self.max_steps)
+            record['steps'] = steps
+            last_action = steps[-1]['action'] if steps else None
+            if last_action in ('done', 'fail'):
+                record['status'] = last_action
+            else:
+                record['status'] = 'max_steps'
+        except Exception as e:
+            record['error'] = f"{type(e).__name__}: {e}"
+        record['duration'] = time.time() - start
+        return record
+
+    def _worker(self, worker_id, goals):
+        while True:
+            try:
+                goal = goals.get_nowait()
+            except queue.Empty:
+                return
+            record = self._run_goal(worker_id, goal)
+            with self._lock:
+                self.results.append(record)
+
+    def run(self, goals):
+        """
+        Runs every goal and returns the per-goal records (in completion order).
+        """
+        self.results = []
+        pending = queue.Queue()
+        for goal in goals:
+            pending.put(goal)
+
+        threads = [
+            threading.Thread(target=self._worker, args=(i, pending), name=f"agent-{i}")
+            for i in range(self.workers)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return self.results
+
+
+def build_report(results, elapsed, ocr_pool=None, llm_pool=None):
+    """
+    Aggregates per-goal records into throughput, latency and pool stats.
+    """
+    all_steps = [step for record in results for step in record['steps']]
+    durations = [record['duration'] for record in results]
+    statuses = {}
+    for record in results:
+        statuses[record['status']] = statuses.get(record['status'], 0) + 1
+
+    report = summarize(all_steps, elapsed)
+    report.update({
+        'goals': len(results),
+        'goals_per_sec': len(results) / elapsed if elapsed > 0 else 0.0,
+        'status': statuses,
+        'goal_duration': {
+            'mean': sum(durations) / len(durations) if durations else 0.0,
+            'p50': percentile(durations, 50),
+            'p95': percentile(durations, 95),
+            'max': max(durations) if durations else 0.0
+        }
+    })
+    # Concurrent workers overlap, so wall time says nothing about time outside the stages
+    report.pop('untimed', None)
+    if ocr_pool:
+        report['ocr_pool'] = ocr_pool.stats()
+    if llm_pool:
+        report['llm_pool'] = llm_pool.stats()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a batch of goals across concurrent agents.")
+    parser.add_argument("goals", help="File with one goal per line.")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent agent workers.")
+    parser.add_argument("--backend", choices=["sim", "x11"], default="sim",
+                        help="'sim': one simulated desktop per goal. 'x11': one X display per worker.")
+    parser.add_argument("--display-base", type=int, default=1,
+                        help="x11 backend: worker i drives display :<base + i> (e.g. Xvfb).")
+    parser.add_argument("--max-steps", type=int, default=20, help="Step limit per goal.")
+    parser.add_argument("--settle", type=float, default=None,
+                        help="Settle wait after each action (s). Defaults to 0 for sim, 2 for x11.")
+    parser.add_argument("--step-budget", type=float, default=None,
+                        help="Per-step latency budget (s); enables graceful degradation.")
+    parser.add_argument("--ocr-workers", type=int, default=1, help="OCR engines in the shared pool.")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="LLM requests in flight at once.")
+    parser.add_argument("--rpm", type=float, default=60, help="LLM requests per minute (0 = unlimited).")
+    parser.add_argument("--ocr-latency", type=float, default=0.0, help="sim: synthetic OCR latency (s).")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="sim: synthetic LLM latency (s).")
+    parser.add_argument("--out", default="batch_results.jsonl", help="Per-goal results (JSON lines).")
+    parser.add_argument("--report", default="batch_report.json", help="Aggregate report (JSON).")
+    parser.add_argument("--verbose", action="store_true", help="Show the agents' own output.")
+    args = parser.parse_args()
+
+    goals = load_goals(args.goals)
+    sim = args.backend == "sim"
+    settle = args.settle if args.settle is not None else (0.0 if sim else 2.0)
+
+    if sim:
+        ocr_pool = OCRPool(args.ocr_workers, factory=lambda: SimOCR(latency=args.ocr_latency))
+        # Each agent binds its own scripted client (see make_agent), so no shared client here
+        llm_pool = LLMPool(max_concurrent=args.llm_concurrency, requests_per_minute=args.rpm)
+    else:
+        ocr_pool = OCRPool(args.ocr_workers, factory=OCRProcessor)
+        llm_pool = LLMPool(LLMClient(), max_concurrent=args.llm_concurrency, requests_per_minute=args.rpm)
+
+    def make_agent(worker_id):
+        if sim:
+            desktop = build_demo_desktop()
+            eye, hand, scale = SimEye(desktop), SimHand(desktop), desktop.scale_factor
+            # Script progress is per client, so every goal starts from the top
+            llm = llm_pool.bind(ScriptedLLMClient(latency=args.llm_latency, loop=False))
+        else:
+            display = f":{args.display_base + worker_id}"
+            # X11 reports physical pixels to both mss and xdotool
+            eye, hand, scale, llm = Eye(display=display), XdotoolHand(display), 1.0, llm_pool
+        return OmniAgent(
+            eye=eye,
+            perception=PerceptionEngine(ocr=ocr_pool, scale_factor=scale, llm_client=llm),
+            brain=Planner(client=llm),
+            hand=hand,
+            voice=SilentVoice(),
+            settle_time=settle,
+            budget=StepBudget(args.step_budget) if args.step_budget else None
+        )
+
+    runner = BatchRunner(make_agent, workers=args.workers, max_steps=args.max_steps)
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    start = time.time()
+    with output:
+        results = runner.run(goals)
+    elapsed = time.time() - start
+
+    with open(args.out, "w") as f:
+        for record in results:
+            f.write(json.dumps(record) + "\n")
+
+    report = build_report(results, elapsed, ocr_pool, llm_pool)
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Goals: {report['goals']} in {elapsed:.2f}s ({report['goals_per_sec']:.2f} goals/s, "
+          f"{report['steps_per_sec']:.1f} steps/s) | Status: {report['status']}")
+    print(f"Goal duration p50={report['goal_duration']['p50']:.2f}s p95={report['goal_duration']['p95']:.2f}s")
+    print(f"OCR pool: {report['ocr_pool']} | LLM pool: {report['llm_pool']}")
+    print(f"Results -> {args.out}, report -> {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,14 +19,15 @@ class LLMClient:
         self.client = OpenAI(api_key=api_key)
         self.model = "gpt-4o"  # Using GPT-4o as requested/standard
         
-    def query(self, messages, tools=None, tool_choice=None):
+    def query(self, messages, tools=None, tool_choice=None, model=None):
         """
         Sends a structured conversation to the LLM and returns the response.
         Supports Function Calling (Tools) if provided.
+        model: overrides self.model for this request (e.g. a cheaper model when over budget).
         """
         try:
             params = {
-                "model": self.model,
+                "model": model or self.model,
                 "messages": messages,
                 "temperature": 0.1 # Low temperature for deterministic actions
             }
@@ -52,16 +53,25 @@ class LLMClient:
             return None
 
 class Planner:
-    def __init__(self):
+    def __init__(self, client=None):
+        # An injected client (e.g. core.simulator.ScriptedLLMClient) skips the API setup.
+        if client is not None:
+            self.client = client
+            return
         try:
             self.client = LLMClient()
         except Exception as e:
             print(f"Warning: {e}. Brain will not function until key is set.")
             self.client = None
 
-    def decide_next_step(self, user_goal, ui_elements):
+    MAX_OFFSCREEN = 50  # Off-screen texts listed in the prompt
+
+    def decide_next_step(self, user_goal, ui_elements, model=None, offscreen=None):
         """
         ui_elements: List of dicts [{'text': 'File', 'center': (20,10)}, ...]
+        model: optional model override passed through to the client.
+        offscreen: texts seen earlier on the current page but scrolled out of view
+        (PerceptionEngine.page); clicking one scrolls back to it.
         """
         if not self.client:
             return {"action": "error", "thought": "LLM Client not initialized (missing API Key)."}
@@ -72,6 +82,11 @@ class Planner:
             text = elem.get('text', 'Unknown')
             context_str += f"- Text: '{text}'\n"
 
+        if offscreen:
+            context_str += "\nSCROLLED OUT OF VIEW (seen earlier on this page):\n"
+            for text in offscreen[:self.MAX_OFFSCREEN]:
+                context_str += f"- Text: '{text}'\n"
+
         # 2. Construct Message History
         messages = [
             {"role": "system", "content": SYSTEM_PROMPT},
@@ -99,7 +114,16 @@ class Planner:
                             },
                             "target_text": {
                                 "type": "string",
-                                "description": "The exact text from the screen elements list to click (required for 'click' action)."
+                                "description": "The exact text from the screen elements list to click (required for 'click' action). For 'scroll', optionally any text inside the area to scroll."
+                            },
+                            "scroll_direction": {
+                                "type": "string",
+                                "enum": ["up", "down"],
+                                "description": "Which way to scroll (required for 'scroll' action)."
+                            },
+                            "scroll_amount": {
+                                "type": "integer",
+                                "description": "How many mouse wheel clicks to scroll (default 3)."
                             },
                             "text_to_type": {
                                 "type": "string",
@@ -116,7 +140,8 @@ class Planner:
         raw_response = self.client.query(
             messages, 
             tools=tools, 
-            tool_choice={"type": "function", "function": {"name": "execute_action"}}
+            tool_choice={"type": "function", "function": {"name": "execute_action"}},
+            model=model
         )
         
         if not raw_response:
@@ -0,0 +1,187 @@
+"""
+Per-step latency budgets with graceful degradation.
+
+A StepBudget splits one loop iteration's deadline across its stages. The
+DeadlineScheduler measures each stage against its share and, when one
+overruns, switches on the next degradation in DEGRADATIONS. A run of
+in-budget steps switches them back off one at a time. Every decision is
+recorded so budgets can be tuned from real runs.
+"""
+import time
+
+# Stages of one OmniAgent.run iteration, in order.
+# 'plan' is decide_next_step, 'locate' is execute_plan (OCR lookup, VLM fallback, click).
+STAGES = ('capture', 'ocr', 'plan', 'locate', 'settle')
+
+DEFAULT_SHARES = {
+    'capture': 0.05,
+    'ocr': 0.20,
+    'plan': 0.40,
+    'locate': 0.10,
+    'settle': 0.25
+}
+
+# Applied in this order as overruns accumulate (cheapest loss of quality first).
+DEGRADATIONS = (
+    'ocr_downscale',  # OCR a downscaled frame
+    'skip_vlm',       # Don't fall back to the VLM when OCR can't find the target
+    'cheap_model',    # Plan with the cheaper model
+    'short_settle'    # Cut the settle wait to whatever is left of the step budget
+)
+
+
+class StepBudget:
+    def __init__(self, total=8.0, shares=None):
+        """
+        total: seconds allowed per step.
+        shares: fraction of the total per stage (see STAGES); must sum to 1.
+        """
+        shares = dict(DEFAULT_SHARES, **(shares or {}))
+        unknown = set(shares) - set(STAGES)
+        if unknown:
+            raise ValueError(f"Unknown budget stages: {sorted(unknown)}")
+        if abs(sum(shares.values()) - 1.0) > 1e-6:
+            raise ValueError(f"Budget shares must sum to 1.0, got {sum(shares.values()):.3f}")
+
+        self.total = total
+        self.shares = shares
+
+    def for_stage(self, stage):
+        return self.total * self.shares[stage]
+
+
+class DeadlineScheduler:
+    def __init__(self, budget, ocr_scale=0.5, cheap_model="gpt-4o-mini", recover_after=3):
+        """
+        budget: StepBudget.
+        ocr_scale: resize factor for OCR input while 'ocr_downscale' is active.
+        cheap_model: model name used while 'cheap_model' is active.
+        recover_after: consecutive in-budget steps before one degradation is lifted.
+        """
+        self.budget = budget
+        self.ocr_scale = ocr_scale
+        self.cheap_model = cheap_model
+        self.recover_after = recover_after
+
+        self.level = 0  # Number of DEGRADATIONS currently active
+        self.decisions = []  # Every escalation, recovery and skipped VLM call, across all steps
+        self.exhausted = 0  # Overruns with nothing left to degrade (logged once per episode)
+        self.step = 0
+        self._clean_steps = 0
+        self._step_start = None
+        self._step_decisions = []
+        self._step_exhausted = 0
+        self._exhaustion_logged = False
+        self._stage_times = {}
+
+    # --- Queries used by the loop ---
+
+    def active(self, degradation):
+        return DEGRADATIONS.index(degradation) < self.level
+
+    def remaining(self):
+        """
+        Seconds left in the current step's budget (negative once it is blown).
+        """
+        if self._step_start is None:
+            return self.budget.total
+        return self.budget.total - (time.time() - self._step_start)
+
+    def ocr_resize(self):
+        return self.ocr_scale if self.active('ocr_downscale') else 1.0
+
+    def model(self):
+        """
+        Model override for the planner, or None to use the client's default.
+        """
+        return self.cheap_model if self.active('cheap_model') else None
+
+    def allow_vlm(self):
+        """
+        Whether the VLM fallback may run now: not while 'skip_vlm' is active, and not
+        when less than the locate share is left of this step (recorded as a 'skip').
+        """
+        if self.active('skip_vlm'):
+            return False
+        allowed = self.budget.for_stage('locate')
+        left = self.remaining()
+        if left < allowed:
+            self._record('skip', 'skip_vlm', 'locate', self.budget.total - left, allowed)
+            return False
+        return True
+
+    def settle_time(self, requested):
+        if not self.active('short_settle'):
+            return requested
+        return max(0.0, min(requested, self.remaining()))
+
+    # --- Bookkeeping ---
+
+    def start_step(self):
+        self.step += 1
+        self._step_start = time.time()
+        self._step_decisions = []
+        self._step_exhausted = 0
+        self._stage_times = {}
+
+    def end_stage(self, stage, elapsed):
+        """
+        Records a stage's duration and degrades one level if it overran its share.
+        The settle stage is sized by the scheduler itself, so it is never an overrun.
+        """
+        self._stage_times[stage] = elapsed
+        if stage == 'settle':
+            return
+        allowed = self.budget.for_stage(stage)
+        if elapsed > allowed:
+            self._degrade(stage, elapsed, allowed)
+
+    def end_step(self):
+        """
+        Closes the step, lifting one degradation after enough clean steps.
+        Returns the step's budget record for the loop's step log.
+        """
+        if self._step_decisions or self._step_exhausted:
+            self._clean_steps = 0
+        else:
+            self._clean_steps += 1
+            if self.level and self._clean_steps >= self.recover_after:
+                self.level -= 1
+                self._exhaustion_logged = False
+                self._record('recover', DEGRADATIONS[self.level], None, None)
+                self._clean_steps = 0
+
+        return {
+            'level': self.level,
+            'remaining': self.remaining(),
+            'stages': dict(self._stage_times),
+            'decisions': list(self._step_decisions),
+            'exhausted': self._step_exhausted
+        }
+
+    def _degrade(self, stage, elapsed, allowed):
+        if self.level < len(DEGRADATIONS):
+            self.level += 1
+            self._record('degrade', DEGRADATIONS[self.level - 1], stage, elapsed, allowed)
+        else:
+            # Nothing left to give up. Log the first overrun so the budget can be
+            # revisited and only count the rest, or long runs drown in these.
+            self.exhausted += 1
+            self._step_exhausted += 1
+            if not self._exhaustion_logged:
+                self._exhaustion_logged = True
+                self._record('exhausted', None, stage, elapsed, allowed)
+
+    def _record(self, kind, degradation, stage, elapsed, allowed=None):
+        decision = {
+            'step': self.step,
+            'kind': kind,
+            'degradation': degradation,
+            'stage': stage,
+            'elapsed': elapsed,
+            'budget': allowed
+        }
+        self.decisions.append(decision)
+        self._step_decisions.append(decision)
+        if kind == 'degrade':
+            print(f"🐢 {stage} took {elapsed:.2f}s (budget {allowed:.2f}s). Degrading: {degradation}")
@@ -1,4 +1,11 @@
-import pyautogui
+import os
+import subprocess
+try:
+    import pyautogui
+except Exception:
+    # pyautogui raises at import time when there is no display (e.g. headless Linux).
+    # The simulated desktop (core.simulator) does not need it.
+    pyautogui = None
 
 class Hand:
     def __init__(self):
@@ -9,7 +16,8 @@ class Hand:
 
     def move_to(self, x, y):
         """
-        Moves mouse to logical coordinates (x, y).
+        Moves mouse to logical coordinates (x, y). Coordinates are global, so
+        points on a secondary display (possibly negative) work too.
         """
         try:
             pyautogui.moveTo(x, y)
@@ -21,6 +29,17 @@ class Hand:
         self.move_to(x, y)
         pyautogui.click()
 
+    def scroll(self, clicks, x=None, y=None):
+        """
+        Scrolls by `clicks` wheel notches (positive = up) at logical (x, y),
+        or wherever the mouse is if no position is given.
+        """
+        try:
+            pyautogui.scroll(clicks, x=x, y=y)
+        except pyautogui.FailSafeException:
+            print("🚨 FAILSAFE TRIGGERED. ABORTING AGENT.")
+            exit(1)
+
     def type_text(self, text):
         """
         Types the given text string.
@@ -32,3 +51,31 @@ class Hand:
         except pyautogui.FailSafeException:
             print("🚨 FAILSAFE TRIGGERED. ABORTING AGENT.")
             exit(1)
+
+class XdotoolHand:
+    def __init__(self, display):
+        """
+        Drives a specific X display (e.g. ':1' for an Xvfb worker) through xdotool.
+        pyautogui binds to $DISPLAY once at import, so it cannot serve several
+        isolated desktops from one process.
+        """
+        self.display = display
+        self.env = dict(os.environ, DISPLAY=display)
+
+    def _xdotool(self, *args):
+        subprocess.run(["xdotool", *[str(a) for a in args]], env=self.env, check=True)
+
+    def move_to(self, x, y):
+        self._xdotool("mousemove", x, y)
+
+    def click(self, x, y):
+        self._xdotool("mousemove", x, y, "click", 1)
+
+    def scroll(self, clicks, x=None, y=None):
+        # X11 scrolls with buttons 4 (up) and 5 (down), one click per notch
+        args = ["mousemove", int(round(x)), int(round(y))] if x is not None and y is not None else []
+        self._xdotool(*args, "click", "--repeat", abs(clicks), 4 if clicks > 0 else 5)
+
+    def type_text(self, text):
+        # Same 50ms per keystroke as Hand.type_text
+        self._xdotool("type", "--delay", 50, "--", text)
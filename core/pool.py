@@ -0,0 +1,151 @@
+"""
+Shared resources for running many agents in one process.
+
+OCRPool and LLMPool expose the same interfaces as OCRProcessor.scan and
+LLMClient.query, so they can be injected into PerceptionEngine and Planner
+in place of a per-agent engine/client. Agents that need a client of their
+own (e.g. a stateful ScriptedLLMClient) can still share a pool's limits
+through LLMPool.bind.
+"""
+import queue
+import threading
+import time
+
+
+class OCRPool:
+    def __init__(self, size=1, factory=None):
+        """
+        Loads `size` OCR engines once and lends them out per scan.
+        factory: callable returning an engine with .scan(image); defaults to OCRProcessor.
+        """
+        if factory is None:
+            from core.vision import OCRProcessor
+            factory = OCRProcessor
+
+        self.size = size
+        self._engines = queue.Queue()
+        for _ in range(size):
+            self._engines.put(factory())
+
+        self._lock = threading.Lock()
+        self.scans = 0
+        self.wait_time = 0.0  # Total seconds callers spent waiting for a free engine
+
+    def scan(self, image_array):
+        return self._with_engine(lambda engine: engine.scan(image_array))
+
+    def scan_region(self, image_array, rect):
+        return self._with_engine(lambda engine: engine.scan_region(image_array, rect))
+
+    def _with_engine(self, work):
+        t0 = time.time()
+        engine = self._engines.get()
+        waited = time.time() - t0
+        try:
+            return work(engine)
+        finally:
+            self._engines.put(engine)
+            with self._lock:
+                self.scans += 1
+                self.wait_time += waited
+
+    def stats(self):
+        with self._lock:
+            return {
+                'engines': self.size,
+                'scans': self.scans,
+                'mean_wait': self.wait_time / self.scans if self.scans else 0.0
+            }
+
+
+class LLMPool:
+    def __init__(self, client=None, max_concurrent=4, requests_per_minute=60, burst=None):
+        """
+        Shares one LLM client (and its HTTP connection pool) between agents.
+        client: the shared client behind query(); may be None if every agent binds its own.
+        max_concurrent: requests allowed in flight at once.
+        requests_per_minute: token-bucket refill rate; None disables rate limiting.
+        burst: bucket capacity, defaults to max_concurrent.
+        """
+        self.client = client
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self.max_concurrent = max_concurrent
+        self.requests_per_minute = requests_per_minute
+        self.burst = burst or max_concurrent
+
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._last_refill = time.time()
+
+        self.requests = 0
+        self.throttled = 0  # Requests that had to wait for the rate limiter
+        self.wait_time = 0.0
+
+    def _acquire_token(self):
+        """
+        Blocks until the token bucket allows another request.
+        Returns True if the caller had to wait.
+        """
+        if not self.requests_per_minute:
+            return False
+
+        rate = self.requests_per_minute / 60.0
+        waited = False
+        while True:
+            with self._lock:
+                now = time.time()
+                self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * rate)
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / rate
+            waited = True
+            time.sleep(delay)
+
+    def query(self, messages, tools=None, tool_choice=None, model=None):
+        return self.run(lambda: self.client.query(messages, tools=tools, tool_choice=tool_choice, model=model))
+
+    def bind(self, client):
+        """
+        Returns a client that queries `client` under this pool's rate limit and
+        concurrency cap.
+        """
+        return PooledClient(self, client)
+
+    def run(self, request):
+        """
+        Calls request() once the rate limiter and a free slot allow it.
+        """
+        t0 = time.time()
+        throttled = self._acquire_token()
+        with self._slots:
+            waited = time.time() - t0
+            with self._lock:
+                self.requests += 1
+                self.wait_time += waited
+                if throttled:
+                    self.throttled += 1
+            return request()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_concurrent': self.max_concurrent,
+                'requests_per_minute': self.requests_per_minute,
+                'requests': self.requests,
+                'throttled': self.throttled,
+                'mean_wait': self.wait_time / self.requests if self.requests else 0.0
+            }
+
+
+class PooledClient:
+    def __init__(self, pool, client):
+        """
+        A per-agent client whose requests count against a shared LLMPool (see LLMPool.bind).
+        """
+        self.pool = pool
+        self.client = client
+
+    def query(self, messages, tools=None, tool_choice=None, model=None):
+        return self.pool.run(lambda: self.client.query(messages, tools=tools, tool_choice=tool_choice, model=model))
@@ -0,0 +1,214 @@
+"""
+On-demand profiling of the agent loop.
+
+StepProfiler samples the loop thread's Python stack during selected steps and
+tracks allocations per stage with tracemalloc. Each profiled step writes:
+  <output_dir>/step_NNNN.folded       collapsed stacks ("stage;a;b;c count"), for
+                                      flamegraph.pl, speedscope or inferno
+  <output_dir>/step_NNNN_memory.json  per-stage allocated/peak bytes and top allocation sites
+
+When the profiler is disabled the loop only pays a flag check per stage.
+tracemalloc is process-wide, so profile one agent at a time in batch runs.
+"""
+import os
+import sys
+import json
+import threading
+import tracemalloc
+
+# Samples passing through these files are the profiler's own overhead (snapshots, stage bookkeeping)
+_OVERHEAD_FILES = {os.path.basename(__file__), os.path.basename(tracemalloc.__file__)}
+
+
+class StackSampler:
+    def __init__(self, thread_id, interval=0.005, lines=True):
+        """
+        Samples the stack of `thread_id` every `interval` seconds from a daemon thread.
+        lines: include line numbers, which separates work done on different lines
+        of the same function (e.g. OCR call vs box conversion in scan_full).
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.lines = lines
+        self.stage = None  # Prefixed to every sample so the flamegraph splits by stage; None pauses sampling
+        self.counts = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            # Between stages the loop is mostly in the profiler's own bookkeeping
+            stage = self.stage
+            frame = sys._current_frames().get(self.thread_id)
+            if stage is None or frame is None:
+                continue
+            stack = self._collapse(frame)
+            if stack is None:
+                continue
+            stack = f"{stage};{stack}"
+            self.counts[stack] = self.counts.get(stack, 0) + 1
+            self.samples += 1
+
+    def _collapse(self, frame):
+        """
+        Folds a stack into "root;...;leaf", or returns None for profiler overhead.
+        """
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            if os.path.basename(code.co_filename) in _OVERHEAD_FILES:
+                return None
+            if self.lines:
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            else:
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+            frame = frame.f_back
+        # Folded format is root-first and uses ';' as the separator
+        return ";".join(name.replace(";", ":") for name in reversed(names))
+
+    def folded(self):
+        return "\n".join(f"{stack} {count}" for stack, count in sorted(self.counts.items()))
+
+
+class StepProfiler:
+    def __init__(self, output_dir="profiles", interval=0.005, top_allocations=5):
+        """
+        output_dir: where .folded and _memory.json files are written.
+        interval: seconds between stack samples.
+        top_allocations: allocation sites listed per stage (0 skips the snapshots).
+        """
+        self.output_dir = output_dir
+        self.interval = interval
+        self.top_allocations = top_allocations
+
+        self.active = False
+        self.every = 1
+        self.steps = None  # Explicit set of step numbers to profile, or None for every N-th
+
+        self._sampler = None
+        self._owns_tracemalloc = False
+        self._stage_base = 0
+        self._stage_snapshot = None
+        self._memory = {}
+        self._step = None
+
+    # --- Runtime switch ---
+
+    def enable(self, every=1, steps=None):
+        """
+        Profiles every `every`-th step, or only the step numbers in `steps` (1-based).
+        """
+        self.every = max(1, every)
+        self.steps = set(steps) if steps else None
+        self.active = True
+        print(f"🔬 Profiling enabled -> {self.output_dir}/")
+
+    def disable(self):
+        self.active = False
+        print("🔬 Profiling disabled.")
+
+    def toggle(self):
+        if self.active:
+            self.disable()
+        else:
+            self.enable(self.every, self.steps)
+
+    def wants(self, step):
+        if not self.active:
+            return False
+        if self.steps is not None:
+            return step in self.steps
+        return step % self.every == 0
+
+    # --- Step / stage hooks (only called while a step is being profiled) ---
+
+    def begin_step(self, step):
+        self._step = step
+        self._memory = {}
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        self._sampler = StackSampler(threading.get_ident(), self.interval)
+        self._sampler.start()
+
+    def begin_stage(self, stage):
+        # Snapshot first so its own cost isn't attributed to the stage's samples
+        if self.top_allocations:
+            self._stage_snapshot = self._snapshot()
+        tracemalloc.reset_peak()
+        self._stage_base = tracemalloc.get_traced_memory()[0]
+        self._sampler.stage = stage
+
+    def end_stage(self, stage):
+        self._sampler.stage = None
+        current, peak = tracemalloc.get_traced_memory()
+        record = {
+            'allocated': current - self._stage_base,  # Still alive at the end of the stage
+            'peak': peak - self._stage_base           # Highest point above the stage's start
+        }
+        if self.top_allocations and self._stage_snapshot is not None:
+            diff = self._snapshot().compare_to(self._stage_snapshot, 'lineno')
+            record['top'] = [
+                {'site': str(stat.traceback), 'size_diff': stat.size_diff, 'count_diff': stat.count_diff}
+                for stat in diff[:self.top_allocations]
+            ]
+        self._memory[stage] = record
+
+    def end_step(self):
+        """
+        Stops sampling and writes this step's files. Returns the memory report.
+        """
+        sampler = self._sampler
+        self._stop()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"step_{self._step:04d}")
+        with open(base + ".folded", "w") as f:
+            f.write(sampler.folded() + "\n")
+
+        report = {
+            'step': self._step,
+            'samples': sampler.samples,
+            'interval': self.interval,
+            'peak': max((m['peak'] for m in self._memory.values()), default=0),
+            'stages': self._memory
+        }
+        with open(base + "_memory.json", "w") as f:
+            json.dump(report, f, indent=2)
+
+        print(f"🔬 Profiled step {self._step}: {report['samples']} samples, "
+              f"peak {report['peak'] / 1e6:.1f} MB -> {base}.folded")
+        return report
+
+    def abort(self):
+        """
+        Closes a step that won't finish (the loop raised) without writing files,
+        so neither the sampler thread nor tracemalloc outlives it.
+        """
+        self._stop()
+
+    def _stop(self):
+        if self._sampler:
+            self._sampler.stop()
+            self._sampler = None
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__)
+        ])
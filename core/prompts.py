@@ -14,4 +14,6 @@ RULES:
 - If you cannot find the element, set "action" to "fail" and explain why in "thought".
 - Do NOT make up coordinates. Only use what is provided in the visual context.
 - If the user asks to type something, use the "text_to_type" parameter.
+- If the element you need is not listed but the page likely continues (a list, a long document), use "scroll" with "scroll_direction" before giving up.
+- Elements under 'SCROLLED OUT OF VIEW' can be clicked like visible ones; the agent scrolls back to them.
 """
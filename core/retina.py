@@ -1,18 +1,66 @@
-import Quartz
-from AppKit import NSScreen
+import threading
+try:
+    import Quartz
+    from AppKit import NSScreen
+except ImportError:
+    # Non-macOS host (e.g. headless Linux running the simulated desktop).
+    NSScreen = None
+
+# Scale factor per display, keyed by its mss monitor rect (left, top, width, height)
+_scale_cache = {}
+_scale_lock = threading.Lock()
 
 def get_scale_factor():
     """
     Dynamically fetches the backingScaleFactor of the main screen.
     Returns: float (usually 2.0 for Retina, 1.0 for standard)
     """
+    if NSScreen is None:
+        return 1.0
     screen = NSScreen.mainScreen()
     scale = screen.backingScaleFactor()
     return scale
 
+def get_display_scale(monitor):
+    """
+    Scale factor of one display, given its mss monitor dict
+    ({'left', 'top', 'width', 'height'} in logical points).
+    Looked up once per display; call clear_scale_cache() after displays are rearranged.
+    """
+    key = (monitor['left'], monitor['top'], monitor['width'], monitor['height'])
+    with _scale_lock:
+        if key in _scale_cache:
+            return _scale_cache[key]
+    scale = _display_scale_backend(key)
+    with _scale_lock:
+        _scale_cache[key] = scale
+    return scale
+
+def clear_scale_cache():
+    with _scale_lock:
+        _scale_cache.clear()
+
+def _macos_display_scale(key):
+    # NSScreen frames have their origin at the bottom-left of the primary screen
+    # with y pointing up; mss (CoreGraphics) uses the top-left with y pointing down.
+    screens = NSScreen.screens()
+    primary_height = screens[0].frame().size.height
+    for screen in screens:
+        frame = screen.frame()
+        top = primary_height - (frame.origin.y + frame.size.height)
+        if (int(frame.origin.x), int(top), int(frame.size.width), int(frame.size.height)) == key:
+            return screen.backingScaleFactor()
+    return get_scale_factor()
+
+def _x11_display_scale(key):
+    # X11 has a single coordinate space: mss, xdotool and pyautogui all work in
+    # physical pixels, so every display maps 1:1.
+    return 1.0
+
+_display_scale_backend = _macos_display_scale if NSScreen is not None else _x11_display_scale
+
 def to_logical(physical_x, physical_y, scale_factor):
     """
     Converts OCR coordinates (physical) to Mouse coordinates (logical).
     """
     return int(physical_x / scale_factor), int(physical_y / scale_factor)
-
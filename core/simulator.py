@@ -0,0 +1,555 @@
+"""
+Simulated desktop for running the agent loop headlessly.
+
+VirtualDesktop renders synthetic windows, buttons and text fields with OpenCV
+and reacts to clicks and typing. SimEye, SimHand, SimOCR, ScriptedLLMClient and
+SilentVoice are drop-in stand-ins for Eye, Hand, OCRProcessor, LLMClient and
+Voice, so OmniAgent can be driven end to end without a real screen or network.
+"""
+import json
+import time
+import threading
+import cv2
+import numpy as np
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+FONT_SCALE = 0.6  # Per logical point; multiplied by the desktop scale factor
+TEXT_PADDING = 8
+
+DESKTOP_COLOR = (90, 60, 30)
+WINDOW_COLOR = (235, 235, 235)
+TITLE_BAR_COLOR = (200, 200, 200)
+BUTTON_COLOR = (210, 210, 210)
+BUTTON_PRESSED_COLOR = (120, 190, 120)  # Far enough from BUTTON_COLOR to pass the stall check
+FIELD_COLOR = (255, 255, 255)
+TEXT_COLOR = (0, 0, 0)
+TITLE_BAR_HEIGHT = 28
+STATUS_BAR_HEIGHT = 28
+SCROLL_STEP = 40  # Logical points per scroll click
+
+# Last frame captured by SimEye on each thread. Derived images (e.g. a frame
+# resized for OCR) lose their SimFrame tag, so SimOCR falls back to this.
+_last_capture = threading.local()
+
+
+class SimFrame(np.ndarray):
+    """
+    A captured frame that carries the desktop's OCR ground truth from the moment
+    of capture, so a SimOCR shared between desktops knows what it is looking at.
+    """
+    ocr_results = None
+
+
+class Widget:
+    def __init__(self, label, rect):
+        # rect: (x, y, w, h) in logical points, desktop coordinates
+        self.label = label
+        self.rect = rect
+
+    def contains(self, x, y):
+        rx, ry, rw, rh = self.rect
+        return rx <= x < rx + rw and ry <= y < ry + rh
+
+    def text(self):
+        return self.label
+
+
+class Button(Widget):
+    def __init__(self, label, rect, on_click=None):
+        super().__init__(label, rect)
+        # on_click(desktop) lets a scene wire buttons to windows (open/close, etc.)
+        self.on_click = on_click
+        self.clicks = 0
+
+
+class TextField(Widget):
+    def __init__(self, label, rect):
+        super().__init__(label, rect)
+        self.value = ""
+
+    def text(self):
+        # Keep the label visible so the field stays findable after typing, and
+        # show only the tail of long input like a real single-line field.
+        return f"{self.label}: {self.value[-24:]}"
+
+
+class Window:
+    def __init__(self, title, rect, widgets=None, visible=True):
+        self.title = title
+        self.rect = rect
+        self.widgets = widgets or []
+        self.visible = visible
+
+    def contains(self, x, y):
+        rx, ry, rw, rh = self.rect
+        return rx <= x < rx + rw and ry <= y < ry + rh
+
+    def viewport(self):
+        """
+        Logical rect that clips the widgets, or None if they are never clipped.
+        """
+        return None
+
+    def layout(self):
+        """
+        (widget, rect) for every widget at least partly on screen, in desktop coordinates.
+        """
+        return [(widget, widget.rect) for widget in self.widgets]
+
+    def readable(self, box):
+        """
+        True if text with logical bounding box (x1, y1, x2, y2) is fully on screen
+        (partly clipped text isn't OCR'd).
+        """
+        return True
+
+
+class ScrollWindow(Window):
+    def __init__(self, title, rect, widgets=None, visible=True):
+        """
+        A window whose widgets scroll under the title bar. Widget rects are given
+        in desktop coordinates at scroll offset 0.
+        """
+        super().__init__(title, rect, widgets, visible)
+        self.offset = 0  # Logical points scrolled down from the top
+
+    def viewport(self):
+        x, y, w, h = self.rect
+        return (x, y + TITLE_BAR_HEIGHT, w, h - TITLE_BAR_HEIGHT)
+
+    def max_offset(self):
+        _, vy, _, vh = self.viewport()
+        bottom = max((wy + wh for _, wy, _, wh in (w.rect for w in self.widgets)), default=0)
+        return max(0, bottom + TEXT_PADDING - (vy + vh))
+
+    def scroll_by(self, dy):
+        self.offset = min(self.max_offset(), max(0, self.offset + dy))
+
+    def layout(self):
+        _, vy, _, vh = self.viewport()
+        placed = []
+        for widget in self.widgets:
+            x, y, w, h = widget.rect
+            y -= self.offset
+            if y + h > vy and y < vy + vh:
+                placed.append((widget, (x, y, w, h)))
+        return placed
+
+    def readable(self, box):
+        _, vy, _, vh = self.viewport()
+        return box[1] >= vy and box[3] <= vy + vh
+
+
+class VirtualDesktop:
+    def __init__(self, width=1280, height=800, scale_factor=1.0):
+        """
+        width/height are logical points. Frames are rendered in physical pixels
+        (logical * scale_factor), like a Retina screenshot.
+        """
+        self.width = width
+        self.height = height
+        self.scale_factor = scale_factor
+        self.windows = []
+        self.focused = None
+        self.status = "Ready"
+        self.events = []  # [('click', 'Save'), ('type', 'hello'), ...]
+        self.cursor = (0, 0)
+        self._frame = None
+        # Hand calls arrive from the agent thread while a runner may be reading frames
+        self._lock = threading.RLock()
+
+    def add_window(self, window):
+        with self._lock:
+            self.windows.append(window)
+            self._frame = None
+        return window
+
+    def find_window(self, title):
+        for window in self.windows:
+            if window.title == title:
+                return window
+        return None
+
+    def invalidate(self):
+        """
+        Forces the next render() to redraw. Call after mutating widgets directly.
+        """
+        self._frame = None
+
+    # --- Input ---
+
+    def move_to(self, x, y):
+        self.cursor = (x, y)
+
+    def click(self, x, y):
+        """
+        Dispatches a click at logical (x, y) to the topmost visible window.
+        Returns the widget that was hit, or None.
+        """
+        with self._lock:
+            self.cursor = (x, y)
+            hit = None
+            window = self._window_at(x, y)
+            viewport = window.viewport() if window else None
+            if window and (viewport is None or Widget(None, viewport).contains(x, y)):
+                for widget, rect in window.layout():
+                    if Widget(None, rect).contains(x, y):
+                        hit = widget
+                        break
+
+            if isinstance(hit, Button):
+                hit.clicks += 1
+                self.focused = None
+                self.status = f"Clicked {hit.label}"
+                if hit.on_click:
+                    hit.on_click(self)
+            elif isinstance(hit, TextField):
+                self.focused = hit
+                self.status = f"Editing {hit.label}"
+            else:
+                self.focused = None
+                self.status = f"Clicked empty space at {x},{y}"
+
+            self.events.append(('click', hit.label if hit else None))
+            self._frame = None
+            return hit
+
+    def scroll(self, clicks, x=None, y=None):
+        """
+        Scrolls the window under (x, y), or under the cursor. Like pyautogui,
+        positive clicks scroll up (content moves down).
+        """
+        with self._lock:
+            if x is not None and y is not None:
+                self.cursor = (x, y)
+            window = self._window_at(*self.cursor)
+            if isinstance(window, ScrollWindow):
+                window.scroll_by(-clicks * SCROLL_STEP)
+                self.status = f"Scrolled {'up' if clicks > 0 else 'down'}"
+            else:
+                self.status = "Scrolled nothing"
+            self.events.append(('scroll', clicks))
+            self._frame = None
+
+    def _window_at(self, x, y):
+        for window in reversed(self.windows):
+            if window.visible and window.contains(x, y):
+                return window
+        return None
+
+    def type_text(self, text):
+        with self._lock:
+            if self.focused is not None:
+                self.focused.value += text
+                self.status = f"Typed {len(text)} chars"
+            else:
+                self.status = "Typed with no focus"
+            self.events.append(('type', text))
+            self._frame = None
+
+    # --- Output ---
+
+    def _text_layout(self, text, rect):
+        """
+        Returns (origin, box) for text drawn inside a logical rect.
+        origin is the cv2.putText baseline origin and box is (x1, y1, x2, y2),
+        both in physical pixels.
+        """
+        s = self.scale_factor
+        (tw, th), baseline = cv2.getTextSize(text, FONT, FONT_SCALE * s, max(1, int(s)))
+        x = int((rect[0] + TEXT_PADDING) * s)
+        y = int((rect[1] + rect[3] / 2) * s + th / 2)
+        return (x, y), (x, y - th, x + tw, y + baseline)
+
+    def _text_items(self):
+        """
+        Yields (text, logical rect) for every visible piece of text, back to front.
+        """
+        for window in self.windows:
+            if not window.visible:
+                continue
+            x, y, w, _ = window.rect
+            yield window.title, (x, y, w, TITLE_BAR_HEIGHT)
+            for widget, rect in window.layout():
+                text = widget.text()
+                _, box = self._text_layout(text, rect)
+                if window.readable([v / self.scale_factor for v in box]):
+                    yield text, rect
+        yield f"Status: {self.status}", (0, self.height - STATUS_BAR_HEIGHT, self.width, STATUS_BAR_HEIGHT)
+
+    def _px(self, rect):
+        s = self.scale_factor
+        x, y, w, h = rect
+        return (int(x * s), int(y * s)), (int((x + w) * s) - 1, int((y + h) * s) - 1)
+
+    def render(self):
+        """
+        Returns the current frame as a BGR numpy array in physical pixels.
+        The frame is cached until the desktop state changes; callers must copy
+        it before modifying it.
+        """
+        with self._lock:
+            if self._frame is not None:
+                return self._frame
+
+            s = self.scale_factor
+            frame = np.empty((int(self.height * s), int(self.width * s), 3), dtype=np.uint8)
+            frame[:] = DESKTOP_COLOR
+            thickness = max(1, int(s))
+
+            for window in self.windows:
+                if not window.visible:
+                    continue
+                p1, p2 = self._px(window.rect)
+                cv2.rectangle(frame, p1, p2, WINDOW_COLOR, -1)
+                x, y, w, _ = window.rect
+                t1, t2 = self._px((x, y, w, TITLE_BAR_HEIGHT))
+                cv2.rectangle(frame, t1, t2, TITLE_BAR_COLOR, -1)
+                self._draw_text(frame, window.title, (x, y, w, TITLE_BAR_HEIGHT), (0, 0))
+
+                # Scrolled widgets are drawn on a copy of the viewport so they clip at its edges
+                viewport = window.viewport()
+                if viewport:
+                    (v1x, v1y), (v2x, v2y) = self._px(viewport)
+                    canvas, origin = frame[v1y:v2y + 1, v1x:v2x + 1].copy(), (v1x, v1y)
+                else:
+                    canvas, origin = frame, (0, 0)
+
+                for widget, rect in window.layout():
+                    w1, w2 = self._px(rect)
+                    w1 = (w1[0] - origin[0], w1[1] - origin[1])
+                    w2 = (w2[0] - origin[0], w2[1] - origin[1])
+                    if isinstance(widget, TextField):
+                        cv2.rectangle(canvas, w1, w2, FIELD_COLOR, -1)
+                        border = (255, 120, 0) if widget is self.focused else (120, 120, 120)
+                        cv2.rectangle(canvas, w1, w2, border, thickness)
+                    else:
+                        color = BUTTON_PRESSED_COLOR if getattr(widget, 'clicks', 0) % 2 else BUTTON_COLOR
+                        cv2.rectangle(canvas, w1, w2, color, -1)
+                    self._draw_text(canvas, widget.text(), rect, origin)
+
+                if viewport:
+                    frame[v1y:v2y + 1, v1x:v2x + 1] = canvas
+
+            status_rect = (0, self.height - STATUS_BAR_HEIGHT, self.width, STATUS_BAR_HEIGHT)
+            b1, b2 = self._px(status_rect)
+            cv2.rectangle(frame, b1, b2, TITLE_BAR_COLOR, -1)
+            self._draw_text(frame, f"Status: {self.status}", status_rect, (0, 0))
+
+            self._frame = frame
+            return frame
+
+    def _draw_text(self, canvas, text, rect, origin):
+        s = self.scale_factor
+        (x, y), _ = self._text_layout(text, rect)
+        cv2.putText(canvas, text, (x - origin[0], y - origin[1]), FONT, FONT_SCALE * s, TEXT_COLOR,
+                    max(1, int(s)), cv2.LINE_AA)
+
+    def snapshot(self):
+        """
+        Returns a copy of the current frame as a SimFrame tagged with its OCR ground truth.
+        """
+        with self._lock:
+            frame = self.render().copy().view(SimFrame)
+            frame.ocr_results = self.ocr_results()
+            return frame
+
+    def ocr_results(self):
+        """
+        Ground-truth OCR for the current state, in PaddleOCR's format:
+        [[ [[x1,y1],[x2,y1],[x2,y2],[x1,y2]], (text, confidence) ], ...] (physical pixels)
+        """
+        with self._lock:
+            results = []
+            for text, rect in self._text_items():
+                _, (x1, y1, x2, y2) = self._text_layout(text, rect)
+                box = [[x1, y1], [x2, y1], [x2, y2], [x1, y2]]
+                results.append([box, (text, 1.0)])
+            return results
+
+
+INBOX_SUBJECTS = [
+    "Lunch plans", "Quarterly report", "Build failed", "Invoice", "Team offsite",
+    "Password reset", "Design review", "Standup notes", "Release checklist", "Welcome aboard",
+    "Server alert", "Holiday schedule", "Expense approval", "Roadmap draft", "Security update",
+    "Customer feedback", "Hiring update", "Budget sync", "Launch party", "Weekly digest",
+    "Bug triage", "Contract renewal", "Onboarding", "Travel booking", "Survey results"
+]
+
+
+def build_demo_desktop(scale_factor=1.0):
+    """
+    A small scene: a 'Notes' editor with a toolbar, a search field and a button
+    that opens a hidden 'Settings' window, plus a scrollable 'Inbox'.
+    """
+    desktop = VirtualDesktop(scale_factor=scale_factor)
+
+    def show_settings(d):
+        d.find_window("Settings").visible = True
+
+    def hide_settings(d):
+        d.find_window("Settings").visible = False
+
+    desktop.add_window(Window("Notes", (100, 80, 640, 420), [
+        Button("File", (110, 120, 80, 30)),
+        Button("Edit", (200, 120, 80, 30)),
+        Button("View", (290, 120, 80, 30)),
+        TextField("Search", (110, 170, 400, 34)),
+        Button("Save", (110, 440, 100, 34)),
+        Button("Open Settings", (230, 440, 180, 34), on_click=show_settings),
+    ]))
+    desktop.add_window(Window("Settings", (780, 120, 380, 260), [
+        Button("Dark Mode", (800, 170, 160, 34)),
+        Button("Close", (800, 320, 100, 34), on_click=hide_settings),
+    ], visible=False))
+    desktop.add_window(ScrollWindow("Inbox", (780, 400, 460, 340), [
+        Button(f"Message {i:02d} {subject}", (790, 438 + i * 40, 420, 32))
+        for i, subject in enumerate(INBOX_SUBJECTS)
+    ]))
+    return desktop
+
+
+# Cycles through every widget type in the demo scene; never finishes on its own,
+# so load tests are bounded with OmniAgent.run(max_steps=...).
+DEMO_SCRIPT = [
+    {"thought": "Open the file menu.", "action": "click", "target_text": "File"},
+    {"thought": "Focus the search box.", "action": "click", "target_text": "Search"},
+    {"thought": "Type the query.", "action": "type", "text_to_type": "hello"},
+    {"thought": "Save the note.", "action": "click", "target_text": "Save"},
+    {"thought": "Open the settings.", "action": "click", "target_text": "Open Settings"},
+    {"thought": "Toggle dark mode.", "action": "click", "target_text": "Dark Mode"},
+    {"thought": "Close the settings.", "action": "click", "target_text": "Close"},
+]
+
+
+class SimEye:
+    def __init__(self, desktop):
+        self.desktop = desktop
+
+    def capture(self):
+        """
+        Returns a copy of the current frame, like a fresh mss grab.
+        """
+        frame = self.desktop.snapshot()
+        _last_capture.frame = frame
+        return frame
+
+
+class SimHand:
+    def __init__(self, desktop):
+        self.desktop = desktop
+
+    def move_to(self, x, y):
+        self.desktop.move_to(x, y)
+
+    def click(self, x, y):
+        self.desktop.click(x, y)
+
+    def type_text(self, text):
+        self.desktop.type_text(text)
+
+    def scroll(self, clicks, x=None, y=None):
+        self.desktop.scroll(clicks, x, y)
+
+
+class SimOCR:
+    def __init__(self, desktop=None, latency=0.0):
+        """
+        Stand-in for OCRProcessor that reads the ground truth attached to SimFrames.
+        desktop: fallback for plain arrays; leave unset when the engine is shared
+        between desktops (e.g. in an OCRPool), in which case the calling thread's
+        last SimEye capture is used.
+        latency: seconds to sleep per scan, to model a real OCR engine.
+        """
+        self.desktop = desktop
+        self.latency = latency
+
+    def scan(self, image_array):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._ground_truth(image_array)
+
+    def scan_region(self, image_array, rect):
+        """
+        Ground truth for text fully inside rect = (x1, y1, x2, y2), in full-image
+        coordinates. Latency scales with the region's share of the image.
+        """
+        x1, y1, x2, y2 = rect
+        if self.latency:
+            height, width = image_array.shape[:2]
+            time.sleep(self.latency * (x2 - x1) * (y2 - y1) / (width * height))
+        return [
+            [box, text] for box, text in self._ground_truth(image_array)
+            if box[0][0] >= x1 and box[0][1] >= y1 and box[2][0] <= x2 and box[2][1] <= y2
+        ]
+
+    def _ground_truth(self, image_array):
+        if getattr(image_array, 'ocr_results', None) is not None:
+            results, (height, width) = image_array.ocr_results, image_array.shape[:2]
+        elif self.desktop is not None:
+            s = self.desktop.scale_factor
+            results, (height, width) = self.desktop.ocr_results(), (self.desktop.height * s, self.desktop.width * s)
+        elif getattr(_last_capture, 'frame', None) is not None:
+            frame = _last_capture.frame
+            results, (height, width) = frame.ocr_results, frame.shape[:2]
+        else:
+            return []
+
+        # Map boxes onto the image actually passed in (e.g. downscaled by the deadline scheduler)
+        fx = image_array.shape[1] / width
+        fy = image_array.shape[0] / height
+        if fx == 1 and fy == 1:
+            return results
+        return [
+            [[[x * fx, y * fy] for x, y in box], text]
+            for box, text in results
+        ]
+
+
+class ScriptedLLMClient:
+    def __init__(self, script=None, latency=0.0, loop=True):
+        """
+        Stand-in for LLMClient. Tool-call queries return the next step of the script
+        as a JSON string, exactly like LLMClient.query does for tool arguments.
+        script: list of plan dicts, or callables taking the messages and returning one.
+        loop: restart the script when it runs out; otherwise answer 'done'.
+        latency: seconds to sleep per query, to model network round trips.
+
+        Progress through the script belongs to the client, so give every agent its
+        own; LLMPool.bind lets them share one pool's limits.
+        """
+        self.script = script or DEMO_SCRIPT
+        self.latency = latency
+        self.loop = loop
+        self.calls = 0
+        self.models = {}  # model override -> tool queries, to see which model planned
+        self._index = 0  # Next script step
+        self._lock = threading.Lock()
+
+    def query(self, messages, tools=None, tool_choice=None, model=None):
+        if self.latency:
+            time.sleep(self.latency)
+
+        if not tools:
+            # JSON-mode queries are VLM lookups; the simulator has nothing to add
+            # beyond its OCR ground truth.
+            return json.dumps({"x": None, "y": None})
+
+        with self._lock:
+            index = self._index
+            self._index += 1
+            self.calls += 1
+            self.models[model] = self.models.get(model, 0) + 1
+
+        if index >= len(self.script) and not self.loop:
+            step = {"thought": "Script finished.", "action": "done"}
+        else:
+            step = self.script[index % len(self.script)]
+            if callable(step):
+                step = step(messages)
+        return json.dumps(step)
+
+
+class SilentVoice:
+    def speak(self, text):
+        pass
@@ -1,11 +1,20 @@
-import mss
+try:
+    import mss
+except ImportError:
+    mss = None
 import numpy as np
 import cv2
-from paddleocr import PaddleOCR
+try:
+    from paddleocr import PaddleOCR
+except ImportError:
+    # OCR is optional when a stand-in OCR is injected (see core.simulator).
+    PaddleOCR = None
 import logging
 import base64
 import json
-from core.retina import get_scale_factor, to_logical
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from core.retina import get_scale_factor, get_display_scale, to_logical
 # Import LLMClient for VLM fallback. 
 # Note: This creates a dependency on core.brain, ensuring core.brain doesn't import core.vision to avoid cycles.
 try:
@@ -18,8 +27,15 @@ except ImportError:
 logging.getLogger("ppocr").setLevel(logging.ERROR)
 
 class Eye:
-    def __init__(self):
-        self.sct = mss.mss()
+    def __init__(self, display=None):
+        # display: X display to grab from (e.g. ':1'); None uses the current one
+        self.display = display
+        self.sct = self._open()
+        self._local = threading.local()
+        self._pool = None
+
+    def _open(self):
+        return mss.mss(display=self.display) if self.display else mss.mss()
         
     def capture(self):
         """
@@ -37,6 +53,38 @@ class Eye:
         
         return img
 
+    def capture_all(self, monitors=None):
+        """
+        Grabs several monitors concurrently.
+        monitors: mss monitor indices (1 = primary); None grabs every monitor.
+        Returns one dict per display, in the order requested:
+        {'index': int, 'origin': (x, y) logical top-left in the global desktop,
+         'scale': float, 'image': BGR array}
+        """
+        available = self.sct.monitors
+        indices = list(monitors) if monitors else list(range(1, len(available)))
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=max(1, len(available) - 1), thread_name_prefix="eye")
+        images = list(self._pool.map(lambda i: self._grab(available[i]), indices))
+
+        return [
+            {
+                'index': i,
+                'origin': (available[i]['left'], available[i]['top']),
+                'scale': get_display_scale(available[i]),
+                'image': img
+            }
+            for i, img in zip(indices, images)
+        ]
+
+    def _grab(self, monitor):
+        # mss handles are not thread-safe (one X connection / device context each),
+        # so every grabbing thread keeps its own.
+        sct = getattr(self._local, 'sct', None)
+        if sct is None:
+            sct = self._local.sct = self._open()
+        return cv2.cvtColor(np.array(sct.grab(monitor)), cv2.COLOR_BGRA2BGR)
+
 class OCRProcessor:
     def __init__(self):
         # Initialize the English server-scale model for maximum accuracy.
@@ -61,11 +109,130 @@ class OCRProcessor:
 
         return result[0]
 
+    def scan_region(self, image_array, rect):
+        """
+        OCRs only rect = (x1, y1, x2, y2) of the image (physical pixels).
+        Boxes are returned in full-image coordinates.
+        """
+        x1, y1, x2, y2 = rect
+        results = self.scan(np.ascontiguousarray(image_array[y1:y2, x1:x2]))
+        return [
+            [[[px + x1, py + y1] for px, py in box], text]
+            for box, text in results
+        ]
+
+class PageCache:
+    """
+    Remembers the elements of the scrolling region in page coordinates
+    (logical y + scroll_y), so elements scrolled off-screen can be scrolled back to.
+    """
+    def __init__(self, pixels_per_click=40):
+        self.scroll_y = 0.0  # Logical points scrolled down since the cache was reset
+        self.region = None  # Logical (x1, y1, x2, y2) of the scrolling region on screen
+        self.pixels_per_click = pixels_per_click  # Recalibrated from measured scrolls
+        self.calibrated = False  # Still the default guess; kept across clear(), it's a property of the system
+        self.entries = []  # [{'text': str, 'page': (x, page_y)}, ...]
+
+    def clear(self):
+        self.scroll_y = 0.0
+        self.region = None
+        self.entries = []
+
+    def in_region(self, center):
+        x1, y1, x2, y2 = self.region
+        return x1 <= center[0] < x2 and y1 <= center[1] < y2
+
+    def remember(self, elements):
+        for elem in elements:
+            if not self.in_region(elem['center']):
+                continue
+            page = (elem['center'][0], elem['center'][1] + self.scroll_y)
+            for entry in self.entries:
+                # Same text within a few points is the same element seen again
+                if entry['text'] == elem['text'] and abs(entry['page'][1] - page[1]) <= 4:
+                    entry['page'] = page
+                    break
+            else:
+                self.entries.append({'text': elem['text'], 'page': page})
+
+    def reanchor(self, elements):
+        """
+        Re-derives scroll_y from a full scan by matching texts already in the
+        cache (used when a scroll was too large to measure). Returns False if
+        nothing matched, i.e. this is probably a different page.
+        """
+        if self.region is None:
+            return False
+        offsets = []
+        for elem in elements:
+            if not self.in_region(elem['center']):
+                continue
+            matches = [entry for entry in self.entries if entry['text'] == elem['text']]
+            # Repeated texts ("Reply", "Delete") can't tell where the page is
+            if len(matches) == 1:
+                offsets.append(matches[0]['page'][1] - elem['center'][1])
+        offsets.sort()
+        if not offsets:
+            return False
+        self.scroll_y = offsets[len(offsets) // 2]
+        self.remember(elements)
+        return True
+
+    def offscreen(self):
+        if self.region is None:
+            return []
+        return [
+            entry for entry in self.entries
+            if not self.in_region((entry['page'][0], entry['page'][1] - self.scroll_y))
+        ]
+
+    def locate(self, target_text):
+        """
+        Returns the first off-screen entry matching target_text, or None.
+        """
+        for entry in self.offscreen():
+            if target_text.lower() in entry['text'].lower():
+                return entry
+        return None
+
+    def clicks_to_reveal(self, entry):
+        """
+        Scroll clicks (pyautogui convention: positive = up) that bring `entry`
+        to the middle of the region.
+        """
+        _, y1, _, y2 = self.region
+        delta = (entry['page'][1] - self.scroll_y) - (y1 + y2) / 2
+        clicks = -int(round(delta / self.pixels_per_click))
+        if clicks == 0:
+            clicks = -1 if delta > 0 else 1
+        return clicks
+
+    def calibrate(self, clicks, moved):
+        """
+        moved: logical points the content moved up for `clicks` scroll clicks.
+        Once calibrated, a move well short of the expected one is ignored: the
+        scroll hit the end of the page, which says nothing about the rate.
+        """
+        if not clicks or not moved:
+            return
+        rate = abs(moved / clicks)
+        if self.calibrated and rate < 0.75 * self.pixels_per_click:
+            return
+        self.pixels_per_click = rate
+        self.calibrated = True
+
 class PerceptionEngine:
-    def __init__(self):
-        self.ocr = OCRProcessor()
-        self.scale_factor = get_scale_factor()
-        self.llm_client = None
+    # Incremental perception after a scroll (physical pixels)
+    SCROLL_BAND_GAP = 24  # Unexplained rows closer than this are re-read as one band
+    SCROLL_STRIP_MARGIN = 48  # Extra rows re-read around each band (text clipped at its edge)
+
+    def __init__(self, ocr=None, scale_factor=None, llm_client=None):
+        # Every dependency can be injected so the engine runs against the
+        # simulated desktop without PaddleOCR, Quartz or an API key.
+        self.ocr = ocr if ocr is not None else OCRProcessor()
+        self.scale_factor = scale_factor if scale_factor is not None else get_scale_factor()
+        self.llm_client = llm_client
+        self.page = PageCache()
 
     def get_llm_client(self):
         if not self.llm_client and LLMClient:
@@ -75,12 +242,47 @@ class PerceptionEngine:
                 print(f"Vision Warning: Could not init LLM for VLM tasks: {e}")
         return self.llm_client
 
-    def scan_full(self, image):
+    def scan_full(self, image, resize=1.0, scale_factor=None):
         """
         Scans the full image and returns a list of ALL detected elements.
         Each element is a dict: {'text': str, 'center': (log_x, log_y)}
+        resize: factor applied to the image before OCR (e.g. 0.5 when the step
+        is over budget); boxes are mapped back to full-resolution pixels.
+        scale_factor: the image's display scale, if not self.scale_factor.
         """
+        if resize != 1.0:
+            image = cv2.resize(image, None, fx=resize, fy=resize, interpolation=cv2.INTER_AREA)
         raw_results = self.ocr.scan(image)
+        return self._to_elements(raw_results, resize, scale_factor)
+
+    def scan_displays(self, displays, resize=1.0):
+        """
+        Scans several displays (Eye.capture_all) and returns their elements in
+        global logical coordinates, each tagged with its 'display' index.
+        Displays are OCR'd concurrently up to the engine's capacity (OCRPool.size);
+        a single engine scans them one after another.
+        """
+        def scan(display):
+            ox, oy = display['origin']
+            return [
+                {'text': elem['text'], 'center': (elem['center'][0] + ox, elem['center'][1] + oy),
+                 'display': display['index']}
+                for elem in self.scan_full(display['image'], resize, display['scale'])
+            ]
+
+        workers = min(len(displays), getattr(self.ocr, 'size', 1))
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr") as pool:
+                per_display = list(pool.map(scan, displays))
+        else:
+            per_display = [scan(display) for display in displays]
+        return [elem for elements in per_display for elem in elements]
+
+    def _to_elements(self, raw_results, resize=1.0, scale_factor=None):
+        """
+        Converts raw OCR lines (physical boxes) into logical-point elements.
+        """
+        scale_factor = scale_factor or self.scale_factor
         elements = []
 
         for line in raw_results:
@@ -89,11 +291,11 @@ class PerceptionEngine:
             text = line[1][0]
 
             # Calculate Center in Physical Pixels
-            phys_center_x = (box[0][0] + box[2][0]) / 2
-            phys_center_y = (box[0][1] + box[2][1]) / 2
+            phys_center_x = (box[0][0] + box[2][0]) / 2 / resize
+            phys_center_y = (box[0][1] + box[2][1]) / 2 / resize
 
             # Normalize to Logical Points
-            log_x, log_y = to_logical(phys_center_x, phys_center_y, self.scale_factor)
+            log_x, log_y = to_logical(phys_center_x, phys_center_y, scale_factor)
 
             elements.append({
                 'text': text,
@@ -102,6 +304,195 @@ class PerceptionEngine:
 
         return elements
 
+    def estimate_scroll(self, prev_image, image, expected_dy=None):
+        """
+        Measures a vertical scroll between two frames.
+        Candidate offsets come from phase correlation over the changed area and,
+        if given, from expected_dy (e.g. clicks * pixels per click). Each is checked
+        row by row; the one that explains the most changed rows wins.
+        Returns a dict in physical pixels, or None if the change isn't mostly a scroll:
+            'dy': content offset (negative = moved up)
+            'region': (x1, y1, x2, y2) area covered by the scrolling content
+            'rescan': full-width bands the moved content doesn't explain
+                      (the revealed strip, a status bar, ...), to be OCR'd again
+            'changed': boolean mask of pixels that differ between the frames
+        """
+        if prev_image is None or prev_image.shape != image.shape:
+            return None
+
+        gray1 = cv2.cvtColor(prev_image, cv2.COLOR_BGR2GRAY)
+        gray2 = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        changed = cv2.absdiff(gray1, gray2) > 25
+        changed_rows = changed.any(axis=1)
+        rows = np.flatnonzero(changed_rows)
+        if rows.size == 0:
+            return None
+        cols = np.flatnonzero(changed.any(axis=0))
+        height, width = gray1.shape
+
+        y1, y2, x1, x2 = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+        (_, dy), _ = cv2.phaseCorrelate(gray1[y1:y2, x1:x2].astype(np.float32),
+                                        gray2[y1:y2, x1:x2].astype(np.float32))
+        # Periodic content (lists) can alias the correlation peak, hence the second candidate
+        candidates = {int(round(dy))}
+        if expected_dy:
+            candidates.add(int(round(expected_dy)))
+
+        best_dy, explained = None, None
+        for dy in candidates:
+            if dy == 0 or abs(dy) >= height:
+                continue
+            rows_ok = self._explained_rows(gray1, gray2, changed, dy)
+            if explained is None or rows_ok.sum() > explained.sum():
+                best_dy, explained = dy, rows_ok
+        if best_dy is None or explained.sum() < 0.25 * rows.size:
+            return None
+
+        dy = best_dy
+        # A lone explained row is usually a coincidence, text spans several rows
+        runs = explained & (np.roll(explained, 1) | np.roll(explained, -1))
+        moved = np.flatnonzero(runs if runs.any() else explained)
+        moved_cols = np.flatnonzero(changed[moved].any(axis=0))
+        rx1 = max(0, int(moved_cols[0]) - self.SCROLL_STRIP_MARGIN)
+        rx2 = min(width, int(moved_cols[-1]) + 1 + self.SCROLL_STRIP_MARGIN)
+        # Content enters on the side it scrolls away from
+        ry1, ry2 = int(moved[0]), int(moved[-1]) + 1
+        if dy < 0:
+            ry2 = min(height, ry2 - dy)
+        else:
+            ry1 = max(0, ry1 - dy)
+
+        rescan = []
+        unexplained = np.flatnonzero(changed_rows & ~explained)
+        if unexplained.size:
+            splits = np.flatnonzero(np.diff(unexplained) > self.SCROLL_BAND_GAP) + 1
+            for band in np.split(unexplained, splits):
+                # Margin re-reads text that was clipped at the edge of the band
+                by1 = max(0, int(band[0]) - self.SCROLL_STRIP_MARGIN)
+                by2 = min(height, int(band[-1]) + 1 + self.SCROLL_STRIP_MARGIN)
+                if rescan and by1 <= rescan[-1][3]:
+                    rescan[-1] = (0, rescan[-1][1], width, by2)
+                else:
+                    rescan.append((0, by1, width, by2))
+
+        return {'dy': dy, 'region': (rx1, ry1, rx2, ry2), 'rescan': rescan, 'changed': changed}
+
+    def _explained_rows(self, gray1, gray2, changed, dy):
+        """
+        Marks changed rows whose changed pixels are all accounted for by shifting
+        the previous frame by dy (tolerating 5% noise).
+        """
+        height = gray1.shape[0]
+        explained = np.zeros(height, dtype=bool)
+        # Row y of the new frame shows row y - dy of the old one
+        ya, yb = max(0, dy), min(height, height + dy)
+        mismatch = cv2.absdiff(gray2[ya:yb], gray1[ya - dy:yb - dy]) > 25
+        counts = changed[ya:yb].sum(axis=1)
+        bad = (mismatch & changed[ya:yb]).sum(axis=1)
+        explained[ya:yb] = (counts > 0) & (bad <= 0.05 * counts)
+        return explained
+
+    def _same_patch(self, img1, p1, img2, p2):
+        """
+        True if the patch around p1 in img1 looks like the patch around p2 in img2.
+        The patch is about one line of text tall, so text clipped by the edge of
+        a scroll view no longer matches.
+        """
+        half_w, half_h = int(10 * self.scale_factor), int(6 * self.scale_factor)
+        height, width = img1.shape[:2]
+        (x1, y1), (x2, y2) = p1, p2
+        if not (half_w <= x1 < width - half_w and half_h <= y1 < height - half_h and
+                half_w <= x2 < width - half_w and half_h <= y2 < height - half_h):
+            return False
+        a = img1[y1 - half_h:y1 + half_h + 1, x1 - half_w:x1 + half_w + 1]
+        b = img2[y2 - half_h:y2 + half_h + 1, x2 - half_w:x2 + half_w + 1]
+        return np.count_nonzero(cv2.absdiff(a, b) > 25) <= 0.05 * a.size
+
+    def scan_after_scroll(self, prev_image, image, prev_elements, clicks=None, resize=1.0):
+        """
+        Incremental alternative to scan_full after a scroll: shifts the previous
+        elements by the measured offset and OCRs only the bands the shift doesn't
+        explain (the newly revealed strip, a changed status bar, ...). Elements
+        that leave the region are kept in self.page. Falls back to scan_full if
+        the scroll can't be registered.
+        clicks: scroll clicks that were sent; gives the expected offset and
+        calibrates PageCache.pixels_per_click.
+        resize: as in scan_full, applied to the re-read bands (or the fallback scan).
+        """
+        s = self.scale_factor
+        # Negative clicks scroll down, which moves the content up (negative dy)
+        expected_dy = clicks * self.page.pixels_per_click * s if clicks else None
+        scroll = self.estimate_scroll(prev_image, image, expected_dy)
+        if scroll is None:
+            print("🔄 Couldn't register the scroll. Falling back to a full scan.")
+            elements = self.scan_full(image, resize=resize)
+            scroll_y = self.page.scroll_y
+            if self.page.reanchor(elements):
+                self.page.calibrate(clicks, self.page.scroll_y - scroll_y)
+            else:
+                self.page.clear()
+            return elements
+
+        dy = scroll['dy']
+        _, ry1, _, ry2 = scroll['region']
+        rescan = scroll['rescan']
+        region = tuple(v / s for v in scroll['region'])
+
+        # A region that doesn't overlap the last one is a different page
+        if self.page.region is None or region[1] >= self.page.region[3] or region[3] <= self.page.region[1]:
+            self.page.clear()
+            self.page.region = region
+        else:
+            old = self.page.region
+            self.page.region = (min(old[0], region[0]), min(old[1], region[1]),
+                                max(old[2], region[2]), max(old[3], region[3]))
+        self.page.remember(prev_elements)
+        self.page.scroll_y -= dy / s
+        self.page.calibrate(clicks, -dy / s)
+
+        # Only elements well inside a band are sure to be read again; ones near its
+        # edges may be clipped by it and are de-duplicated against the OCR instead.
+        inset = self.SCROLL_STRIP_MARGIN // 2
+
+        frame_height = image.shape[0]
+
+        def rescanned(py):
+            # Band edges at the frame border can't clip anything
+            return any(
+                y1 + (inset if y1 > 0 else 0) <= py < y2 - (inset if y2 < frame_height else 0)
+                for _, y1, _, y2 in rescan
+            )
+
+        elements = []
+        for elem in prev_elements:
+            px, py = int(round(elem['center'][0] * s)), int(round(elem['center'][1] * s))
+            if self._same_patch(prev_image, (px, py), image, (px, py)):
+                new_py = py  # Didn't move (outside the scrolling area)
+            elif ry1 <= py + dy < ry2 and self._same_patch(prev_image, (px, py), image, (px, py + dy)):
+                new_py = py + dy
+            else:
+                continue  # Scrolled off (kept in self.page) or replaced
+            if rescanned(new_py):
+                continue  # About to be read again
+            elements.append({'text': elem['text'], 'center': (elem['center'][0], int(round(new_py / s)))})
+
+        fresh = []
+        ocr_image = image
+        if resize != 1.0 and rescan:
+            ocr_image = cv2.resize(image, None, fx=resize, fy=resize, interpolation=cv2.INTER_AREA)
+        for x1, y1, x2, y2 in rescan:
+            rect = tuple(int(round(v * resize)) for v in (x1, y1, x2, y2))
+            fresh.extend(self._to_elements(self.ocr.scan_region(ocr_image, rect), resize))
+        elements = [
+            elem for elem in elements
+            if not any(f['text'] == elem['text'] and abs(f['center'][1] - elem['center'][1]) <= inset / s
+                       for f in fresh)
+        ] + fresh
+
+        self.page.remember(elements)
+        elements.sort(key=lambda e: (e['center'][1], e['center'][0]))
+        return elements
+
     def find_element_in_list(self, ui_elements, target_text):
         """
         Helper to look up coordinates in the already-scanned list.
@@ -153,10 +544,28 @@ class PerceptionEngine:
 
         return change_ratio
 
-    def estimate_coordinates_with_vlm(self, image, target_description):
+    def calculate_diff_displays(self, before, after):
+        """
+        calculate_diff for Eye.capture_all frames: the largest change on any display.
+        """
+        return max((self.calculate_diff(a['image'], b['image']) for a, b in zip(before, after)), default=0.0)
+
+    def estimate_coordinates_on_displays(self, displays, target_description):
+        """
+        estimate_coordinates_with_vlm over Eye.capture_all frames, one display at a
+        time until the target is found. Returns global logical (x, y) or None.
+        """
+        for display in displays:
+            coords = self.estimate_coordinates_with_vlm(display['image'], target_description, display['scale'])
+            if coords:
+                return coords[0] + display['origin'][0], coords[1] + display['origin'][1]
+        return None
+
+    def estimate_coordinates_with_vlm(self, image, target_description, scale_factor=None):
         """
         Fallback: Asks GPT-4o Vision where the target is.
         Returns logical (x, y) or None.
+        scale_factor: the image's display scale, if not self.scale_factor.
         """
         client = self.get_llm_client()
         if not client:
@@ -208,7 +617,7 @@ class PerceptionEngine:
             if phys_x is not None and phys_y is not None:
                 # GPT sees the image in its native resolution (Physical Pixels for Retina screenshot)
                 # We need to convert these physical pixels back to logical points for the mouse.
-                return to_logical(phys_x, phys_y, self.scale_factor)
+                return to_logical(phys_x, phys_y, scale_factor or self.scale_factor)
                 
         except json.JSONDecodeError:
             print(f"❌ VLM Error: Could not parse JSON from {response_text}")
@@ -1,9 +1,14 @@
-import pyttsx3
+try:
+    import pyttsx3
+except ImportError:
+    pyttsx3 = None
 import threading
 
 class Voice:
     def __init__(self):
         try:
+            if pyttsx3 is None:
+                raise RuntimeError("pyttsx3 is not installed")
             self.engine = pyttsx3.init()
             # Select a voice (usually index 0 or 1 for standard OS voices)
             # On macOS, 0 is often Alex, 1 is Fred, etc.
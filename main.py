@@ -1,18 +1,41 @@
+import os
 import time
 import sys
+import signal
 from core.vision import Eye, PerceptionEngine
 from core.brain import Planner
 from core.motor import Hand
 from core.voice import Voice
+from core.budget import DeadlineScheduler, STAGES as BUDGET_STAGES
+from core.profiler import StepProfiler
+from core.pool import OCRPool
 
 class OmniAgent:
-    def __init__(self):
+    def __init__(self, eye=None, perception=None, brain=None, hand=None, voice=None, settle_time=2.0,
+                 budget=None, profiler=None, displays=None):
+        """
+        Components default to the real desktop stack. Pass stand-ins (see core.simulator)
+        to run the loop headlessly.
+        settle_time: seconds to wait after an action before the stall check.
+        budget: optional core.budget.StepBudget; enables per-step deadlines with degradation.
+        profiler: core.profiler.StepProfiler; a disabled one is created by default and
+        can be switched on at any time with self.profiler.enable().
+        displays: None watches the primary monitor only. "all", or a list of mss
+        monitor indices, captures and OCRs those displays concurrently every step;
+        elements (and clicks) then use global logical coordinates.
+        """
         print("🚀 Initializing OMNI-OPERATOR...")
-        self.eye = Eye()
-        self.perception = PerceptionEngine()
-        self.brain = Planner()
-        self.hand = Hand()
-        self.voice = Voice()
+        self.eye = eye if eye is not None else Eye()
+        self.perception = perception if perception is not None else PerceptionEngine()
+        self.brain = brain if brain is not None else Planner()
+        self.hand = hand if hand is not None else Hand()
+        self.voice = voice if voice is not None else Voice()
+        self.settle_time = settle_time
+        self.displays = displays
+        self.scheduler = DeadlineScheduler(budget) if budget else None
+        self.profiler = profiler if profiler is not None else StepProfiler()
+        self._profiling = False
+        self._scroll_clicks = None  # Clicks sent by the last scroll action, for incremental perception
         self.voice.speak("Systems Online. Ready to serve.")
         print("✅ Systems Online.")
 
@@ -30,12 +53,21 @@ class OmniAgent:
             # 1. Locate the element coordinates using Phase 2 logic (OCR)
             # We search in the passed 'ui_elements' first to save re-scanning
             coords = self.perception.find_element_in_list(ui_elements, target_text)
+
+            # 2. Scroll back if it was seen earlier on this page
+            if not coords and target_text and self.displays is None:
+                coords, screenshot = self.scroll_to(target_text, ui_elements, screenshot)
             
-            # 2. Fallback to Phase 5 (VLM) if OCR fails
-            if not coords and target_text:
+            # 3. Fallback to Phase 5 (VLM) if OCR fails, unless the step is over budget
+            if not coords and target_text and self.scheduler and not self.scheduler.allow_vlm():
+                print(f"⏭️ OCR failed for '{target_text}'. Skipping VLM fallback (over budget).")
+            elif not coords and target_text:
                 print(f"🤔 OCR failed for '{target_text}'. Trying Vision Fallback (VLM)...")
                 self.voice.speak(f"I can't read {target_text}, looking closer.")
-                coords = self.perception.estimate_coordinates_with_vlm(screenshot, target_text)
+                if self.displays is not None:
+                    coords = self.perception.estimate_coordinates_on_displays(screenshot, target_text)
+                else:
+                    coords = self.perception.estimate_coordinates_with_vlm(screenshot, target_text)
 
             if coords:
                 print(f"🖱️ Clicking '{target_text}' at {coords}")
@@ -44,6 +76,26 @@ class OmniAgent:
                 print(f"❌ Error: Vision lost track of '{target_text}'")
                 self.voice.speak(f"I could not find {target_text} on the screen.")
                 
+        elif action_type == "scroll":
+            direction = plan.get("scroll_direction") or "down"
+            try:
+                amount = abs(int(plan.get("scroll_amount") or 3)) or 3
+            except (TypeError, ValueError):
+                print(f"⚠️ Bad scroll_amount {plan.get('scroll_amount')!r}, scrolling 3 clicks.")
+                amount = 3
+            clicks = amount if direction == "up" else -amount
+            # Scroll over the named element, else over the page being scrolled, else where the mouse is
+            point = target_text and self.perception.find_element_in_list(ui_elements, target_text)
+            if not point and self.perception.page.region:
+                x1, y1, x2, y2 = self.perception.page.region
+                point = ((x1 + x2) / 2, (y1 + y2) / 2)
+            print(f"🖲️ Scrolling {direction} {amount} clicks")
+            if point:
+                self.hand.scroll(clicks, point[0], point[1])
+            else:
+                self.hand.scroll(clicks)
+            self._scroll_clicks = clicks
+
         elif action_type == "type":
             # Use "text_to_type" if available, or fallback to "target_text" if the LLM got confused
             text = plan.get("text_to_type") or plan.get("target_text")
@@ -69,48 +121,171 @@ class OmniAgent:
             
         return False # Continue loop
 
-    def run(self, user_goal):
+    def scroll_to(self, target_text, ui_elements, screenshot, attempts=3):
+        """
+        Scrolls an element that was seen earlier on this page (perception.page)
+        back into view. Returns (coords or None, latest screenshot).
+        """
+        page = self.perception.page
+        for _ in range(attempts):
+            entry = page.locate(target_text)
+            if entry is None:
+                break
+            clicks = page.clicks_to_reveal(entry)
+            x1, y1, x2, y2 = page.region
+            print(f"📜 '{entry['text']}' is scrolled out of view. Scrolling {clicks:+d} clicks to bring it back.")
+            scroll_y = page.scroll_y
+            self.hand.scroll(clicks, (x1 + x2) / 2, (y1 + y2) / 2)
+            time.sleep(min(self.settle_time, 0.5))
+            image = self.eye.capture()
+            # Re-anchors page.scroll_y on the measured offset, so the next attempt aims from where we landed
+            ui_elements = self.perception.scan_after_scroll(screenshot, image, ui_elements, clicks=clicks)
+            screenshot = image
+            coords = self.perception.find_element_in_list(ui_elements, target_text)
+            if coords:
+                return coords, screenshot
+            if page.scroll_y == scroll_y:
+                break  # Didn't move (end of the page, or the page changed under us)
+        return None, screenshot
+
+    def _capture(self):
+        """
+        The primary monitor's frame, or a list of display frames (Eye.capture_all)
+        when watching several displays.
+        """
+        if self.displays is None:
+            return self.eye.capture()
+        return self.eye.capture_all(None if self.displays == "all" else self.displays)
+
+    def _begin_stage(self, stage):
+        if self._profiling:
+            self.profiler.begin_stage(stage)
+
+    def _end_stage(self, stage, elapsed):
+        """
+        Hands a stage's duration to the deadline scheduler and closes it in the profiler.
+        """
+        if self.scheduler and stage in BUDGET_STAGES:
+            self.scheduler.end_stage(stage, elapsed)
+        if self._profiling:
+            self.profiler.end_stage(stage)
+
+    def run(self, user_goal, max_steps=None):
+        """
+        Runs the OODA loop until the plan is done/failed, max_steps is reached or
+        the user interrupts. Returns one record per step:
+        {'action': str, 'capture': s, 'ocr': s, 'think': s, 'act': s, 'total': s}
+        With a budget, records also carry 'budget': the scheduler's stage times
+        and degradation decisions for that step. Profiled steps carry 'profile':
+        the profiler's per-stage memory report.
+        """
+        scheduler = self.scheduler
         print(f"🎯 Mission: {user_goal}")
         self.voice.speak(f"Starting mission: {user_goal}")
+        steps = []
+        previous = None  # (screenshot, ui_elements) of the last step, kept when it scrolled
+        self.perception.page.clear()
         
-        while True:
+        while max_steps is None or len(steps) < max_steps:
             try:
                 loop_start = time.time()
+                if scheduler:
+                    scheduler.start_step()
+                # Checked once per step so the profiler can be toggled mid-run
+                self._profiling = self.profiler.wants(len(steps) + 1)
+                if self._profiling:
+                    self.profiler.begin_step(len(steps) + 1)
 
                 # 1. OBSERVE (Phase 1 & 2)
                 print("👀 Scanning screen...")
                 self.voice.speak("Scanning")
+                self._begin_stage('capture')
                 t0 = time.time()
-                screenshot = self.eye.capture()
+                screenshot = self._capture()
                 t_capture = time.time() - t0
+                self._end_stage('capture', t_capture)
                 
                 # Get structured data: [{'text': 'File', 'center': (x,y)}, ...]
+                self._begin_stage('ocr')
                 t0 = time.time()
-                ui_elements = self.perception.scan_full(screenshot)
+                resize = scheduler.ocr_resize() if scheduler else 1.0
+                if self.displays is not None:
+                    # One frame per display, OCR'd side by side
+                    ui_elements = self.perception.scan_displays(screenshot, resize=resize)
+                elif previous:
+                    # After a scroll only the newly revealed strip needs OCR
+                    prev_screenshot, prev_elements = previous
+                    ui_elements = self.perception.scan_after_scroll(prev_screenshot, screenshot, prev_elements,
+                                                                    clicks=self._scroll_clicks, resize=resize)
+                else:
+                    ui_elements = self.perception.scan_full(screenshot, resize=resize)
                 t_ocr = time.time() - t0
+                self._end_stage('ocr', t_ocr)
                 
                 # 2. ORIENT & DECIDE (Phase 3)
+                self._begin_stage('plan')
                 t0 = time.time()
-                plan = self.brain.decide_next_step(user_goal, ui_elements)
+                model = scheduler.model() if scheduler else None
+                offscreen = [entry['text'] for entry in self.perception.page.offscreen()]
+                plan = self.brain.decide_next_step(user_goal, ui_elements, model=model, offscreen=offscreen)
                 t_think = time.time() - t0
+                self._end_stage('plan', t_think)
                 
                 # 3. ACT (Phase 1 & 4 & 5)
+                self._begin_stage('locate')
                 t0 = time.time()
+                self._scroll_clicks = None
                 is_finished = self.execute_plan(plan, ui_elements, screenshot)
+                if self._scroll_clicks and self.displays is None:
+                    previous = (screenshot, ui_elements)
+                else:
+                    previous = None
+                    if plan.get("action") in ("click", "type"):
+                        # The page may have changed under us; forget what was scrolled past
+                        self.perception.page.clear()
                 t_act = time.time() - t0
+                self._end_stage('locate', t_act)
                 
                 total_time = time.time() - loop_start
                 print(f"⏱️  Latency: Capture={t_capture:.2f}s | OCR={t_ocr:.2f}s | Think={t_think:.2f}s | Act={t_act:.2f}s | Total={total_time:.2f}s")
+                step = {
+                    'action': plan.get("action"),
+                    'capture': t_capture,
+                    'ocr': t_ocr,
+                    'think': t_think,
+                    'act': t_act,
+                    'total': total_time
+                }
+                steps.append(step)
                 
                 if is_finished:
+                    if scheduler:
+                        step['budget'] = scheduler.end_step()
+                    if self._profiling:
+                        step['profile'] = self.profiler.end_step()
+                        self._profiling = False
                     break
                 
                 # 4. WAIT & VERIFY (Latency Management & Stall Detection)
-                time.sleep(2.0) # Allow UI to update
+                self._begin_stage('settle')
+                t0 = time.time()
+                settle = scheduler.settle_time(self.settle_time) if scheduler else self.settle_time
+                time.sleep(settle) # Allow UI to update
+                self._end_stage('settle', time.time() - t0)
+                if scheduler:
+                    step['budget'] = scheduler.end_step()
                 
                 # STALL DETECTION (Phase 5)
-                screenshot_after = self.eye.capture()
-                change_ratio = self.perception.calculate_diff(screenshot, screenshot_after)
+                self._begin_stage('verify')
+                screenshot_after = self._capture()
+                if self.displays is not None:
+                    change_ratio = self.perception.calculate_diff_displays(screenshot, screenshot_after)
+                else:
+                    change_ratio = self.perception.calculate_diff(screenshot, screenshot_after)
+                self._end_stage('verify', None)
+                if self._profiling:
+                    step['profile'] = self.profiler.end_step()
+                    self._profiling = False
                 
                 # If change is very small (< 0.1%), assume stall
                 if change_ratio < 0.001:
@@ -118,12 +293,38 @@ class OmniAgent:
                     self.voice.speak("I don't think that worked.")
                 
             except KeyboardInterrupt:
+                if self._profiling:
+                    self.profiler.end_step()
+                    self._profiling = False
                 print("\n👋 Manual Interruption. Exiting.")
                 self.voice.speak("Stopping.")
                 break
+            except Exception:
+                # Don't leave the sampler thread and tracemalloc running after the caller
+                # (e.g. BatchRunner) recovers from the error
+                if self._profiling:
+                    self.profiler.abort()
+                    self._profiling = False
+                raise
+
+        return steps
 
 if __name__ == "__main__":
-    agent = OmniAgent()
+    # OMNI_DISPLAYS=all (or mss monitor indices, e.g. "1,2") watches several displays.
+    # OMNI_OCR_WORKERS=N loads N OCR engines so those displays are OCR'd in parallel.
+    displays = os.getenv("OMNI_DISPLAYS")
+    if displays and displays != "all":
+        displays = [int(i) for i in displays.split(",")]
+    ocr_workers = int(os.getenv("OMNI_OCR_WORKERS", "1"))
+    perception = PerceptionEngine(ocr=OCRPool(ocr_workers)) if ocr_workers > 1 else None
+    agent = OmniAgent(perception=perception, displays=displays or None)
+
+    # Profiling: OMNI_PROFILE=N profiles every N-th step from the start,
+    # and `kill -USR1 <pid>` toggles it while the agent is running.
+    if os.getenv("OMNI_PROFILE"):
+        agent.profiler.enable(every=int(os.getenv("OMNI_PROFILE")))
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: agent.profiler.toggle())
     
     # Simple CLI input
     goal = input("🤖 What would you like me to do? > ")
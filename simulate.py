@@ -0,0 +1,144 @@
+"""
+Headless load test: drives OmniAgent against the simulated desktop and reports
+steps per second and per-stage latency.
+
+Usage:
+    python simulate.py --steps 1000
+    python simulate.py --steps 200 --ocr-latency 0.3 --llm-latency 1.0 --verbose
+"""
+import argparse
+import contextlib
+import io
+import math
+import time
+from main import OmniAgent
+from core.brain import Planner
+from core.vision import PerceptionEngine, OCRProcessor
+from core.budget import StepBudget
+from core.profiler import StepProfiler
+from core.simulator import (
+    build_demo_desktop, SimEye, SimHand, SimOCR, ScriptedLLMClient, SilentVoice
+)
+
+STAGES = ['capture', 'ocr', 'think', 'act', 'total']
+
+
+def build_sim_agent(desktop=None, script=None, settle_time=0.0, real_ocr=False,
+                    ocr_latency=0.0, llm_latency=0.0, budget=None):
+    """
+    Wires an OmniAgent to a VirtualDesktop and a scripted LLM.
+    real_ocr: run PaddleOCR on the rendered frames instead of the desktop's ground truth.
+    budget: optional StepBudget for the agent's deadline scheduler.
+    """
+    desktop = desktop or build_demo_desktop()
+    ocr = OCRProcessor() if real_ocr else SimOCR(desktop, latency=ocr_latency)
+    llm = ScriptedLLMClient(script, latency=llm_latency)
+    perception = PerceptionEngine(ocr=ocr, scale_factor=desktop.scale_factor, llm_client=llm)
+    return OmniAgent(
+        eye=SimEye(desktop),
+        perception=perception,
+        brain=Planner(client=llm),
+        hand=SimHand(desktop),
+        voice=SilentVoice(),
+        settle_time=settle_time,
+        budget=budget
+    )
+
+
+def percentile(values, q):
+    """
+    Nearest-rank percentile (q in 0..100). Returns 0.0 for an empty list.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = math.ceil(q / 100 * len(ordered))
+    return ordered[min(len(ordered), max(1, rank)) - 1]
+
+
+def summarize(steps, elapsed):
+    """
+    Aggregates OmniAgent.run step records into throughput and latency stats.
+    """
+    report = {
+        'steps': len(steps),
+        'elapsed': elapsed,
+        'steps_per_sec': len(steps) / elapsed if elapsed > 0 else 0.0,
+        # Time spent outside the timed stages: settle wait and stall detection
+        'untimed': max(0.0, elapsed - sum(step['total'] for step in steps)),
+        'latency': {}
+    }
+    for stage in STAGES:
+        values = [step[stage] for step in steps]
+        report['latency'][stage] = {
+            'mean': sum(values) / len(values) if values else 0.0,
+            'p50': percentile(values, 50),
+            'p95': percentile(values, 95),
+            'max': max(values) if values else 0.0
+        }
+
+    # Degradation decisions from the deadline scheduler, if one was running
+    decisions = {}
+    for step in steps:
+        for decision in step.get('budget', {}).get('decisions', []):
+            key = f"{decision['kind']}:{decision['degradation']}"
+            decisions[key] = decisions.get(key, 0) + 1
+    exhausted = sum(step.get('budget', {}).get('exhausted', 0) for step in steps)
+    if exhausted:
+        # Overruns with every degradation already on (only the first is in the decisions)
+        decisions['overruns_exhausted'] = exhausted
+    if decisions:
+        report['degradations'] = decisions
+    return report
+
+
+def print_report(report):
+    print(f"Steps: {report['steps']} in {report['elapsed']:.2f}s "
+          f"({report['steps_per_sec']:.1f} steps/s, {report['untimed']:.2f}s in settle/stall check)")
+    for stage, stats in report['latency'].items():
+        print(f"  {stage:<8} mean={stats['mean'] * 1000:8.2f}ms  p50={stats['p50'] * 1000:8.2f}ms  "
+              f"p95={stats['p95'] * 1000:8.2f}ms  max={stats['max'] * 1000:8.2f}ms")
+    if report.get('degradations'):
+        print(f"  Degradations: {report['degradations']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the agent loop on a simulated desktop.")
+    parser.add_argument("--steps", type=int, default=1000, help="Loop iterations to run.")
+    parser.add_argument("--settle", type=float, default=0.0, help="Settle wait after each action (s).")
+    parser.add_argument("--scale", type=float, default=1.0, help="Simulated backing scale factor.")
+    parser.add_argument("--real-ocr", action="store_true", help="Use PaddleOCR on the rendered frames.")
+    parser.add_argument("--ocr-latency", type=float, default=0.0, help="Synthetic OCR latency (s).")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Synthetic LLM latency (s).")
+    parser.add_argument("--step-budget", type=float, default=None,
+                        help="Per-step latency budget (s); enables graceful degradation.")
+    parser.add_argument("--profile-every", type=int, default=0,
+                        help="Profile every N-th step (stack samples + allocations); 0 = off.")
+    parser.add_argument("--profile-dir", default="profiles", help="Where profiles are written.")
+    parser.add_argument("--verbose", action="store_true", help="Show the agent's own output.")
+    args = parser.parse_args()
+
+    desktop = build_demo_desktop(scale_factor=args.scale)
+    # The agent prints several lines per step; at thousands of steps that dominates the run.
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        agent = build_sim_agent(
+            desktop,
+            settle_time=args.settle,
+            real_ocr=args.real_ocr,
+            ocr_latency=args.ocr_latency,
+            llm_latency=args.llm_latency,
+            budget=StepBudget(args.step_budget) if args.step_budget else None
+        )
+        if args.profile_every:
+            agent.profiler = StepProfiler(output_dir=args.profile_dir)
+            agent.profiler.enable(every=args.profile_every)
+        start = time.time()
+        steps = agent.run("Load test", max_steps=args.steps)
+        elapsed = time.time() - start
+
+    print_report(summarize(steps, elapsed))
+
+
+if __name__ == "__main__":
+    main()
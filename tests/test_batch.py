@@ -0,0 +1,110 @@
+import unittest
+import threading
+import time
+from core.pool import OCRPool, LLMPool
+from core.simulator import SimOCR, ScriptedLLMClient
+from batch import BatchRunner, build_report
+
+class TestPools(unittest.TestCase):
+
+    def test_ocr_pool_limits_concurrent_scans(self):
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        class SlowEngine:
+            def scan(self, image):
+                with lock:
+                    active.append(1)
+                    peak.append(len(active))
+                time.sleep(0.02)
+                with lock:
+                    active.pop()
+                return []
+
+        pool = OCRPool(2, factory=SlowEngine)
+        threads = [threading.Thread(target=pool.scan, args=(None,)) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(max(peak), 2)
+        self.assertEqual(pool.stats()['scans'], 6)
+
+    def test_llm_pool_rate_limits(self):
+        client = ScriptedLLMClient()
+        # 1200 rpm = one request per 50ms after the burst of 1
+        pool = LLMPool(client, max_concurrent=1, requests_per_minute=1200, burst=1)
+
+        start = time.time()
+        for _ in range(4):
+            pool.query([{"role": "user", "content": "GOAL: x"}], tools=[{}])
+        elapsed = time.time() - start
+
+        self.assertGreaterEqual(elapsed, 0.14)
+        self.assertEqual(pool.stats()['throttled'], 3)
+        self.assertEqual(client.calls, 4)
+
+class TestBatchRunner(unittest.TestCase):
+
+    def test_runs_goals_across_workers(self):
+        from simulate import build_sim_agent
+        from core.brain import Planner
+        from core.simulator import DEMO_SCRIPT
+
+        ocr_pool = OCRPool(1, factory=SimOCR)
+        llm_pool = LLMPool(max_concurrent=2, requests_per_minute=None)
+
+        def make_agent(worker_id):
+            agent = build_sim_agent()
+            agent.perception.ocr = ocr_pool
+            agent.brain = Planner(client=llm_pool.bind(ScriptedLLMClient(loop=False)))
+            return agent
+
+        goals = [f"Goal {i}" for i in range(6)]
+        runner = BatchRunner(make_agent, workers=3, max_steps=20)
+        results = runner.run(goals)
+
+        self.assertEqual(sorted(r['goal'] for r in results), goals)
+        self.assertTrue(all(r['status'] == 'done' for r in results))
+        # Each goal walks the whole script, then answers 'done'
+        self.assertTrue(all(len(r['steps']) == len(DEMO_SCRIPT) + 1 for r in results))
+
+        report = build_report(results, elapsed=1.0, ocr_pool=ocr_pool, llm_pool=llm_pool)
+        self.assertEqual(report['goals'], 6)
+        self.assertEqual(report['status'], {'done': 6})
+        self.assertEqual(report['ocr_pool']['scans'], 6 * (len(DEMO_SCRIPT) + 1))
+        self.assertEqual(report['llm_pool']['requests'], 6 * (len(DEMO_SCRIPT) + 1))
+
+    def test_repeated_goal_runs_the_whole_script_each_time(self):
+        # Also checks that a second run() only reports its own goals
+        from simulate import build_sim_agent
+        from core.brain import Planner
+        from core.simulator import DEMO_SCRIPT
+
+        llm_pool = LLMPool(max_concurrent=2, requests_per_minute=None)
+
+        def make_agent(worker_id):
+            agent = build_sim_agent()
+            agent.brain = Planner(client=llm_pool.bind(ScriptedLLMClient(loop=False)))
+            return agent
+
+        runner = BatchRunner(make_agent, workers=2, max_steps=20)
+        runner.run(["Warm up"])
+        results = runner.run(["Open settings"] * 3)
+
+        self.assertEqual([(r['status'], len(r['steps'])) for r in results],
+                         [('done', len(DEMO_SCRIPT) + 1)] * 3)
+
+    def test_agent_errors_are_recorded(self):
+        def make_agent(worker_id):
+            raise RuntimeError("no display")
+
+        results = BatchRunner(make_agent, workers=2).run(["a", "b"])
+
+        self.assertEqual([r['status'] for r in results], ['error', 'error'])
+        self.assertIn("no display", results[0]['error'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+from unittest.mock import patch
+from core.budget import StepBudget, DeadlineScheduler, DEGRADATIONS
+from core.simulator import build_demo_desktop
+from simulate import build_sim_agent
+
+class TestDeadlineScheduler(unittest.TestCase):
+
+    def test_shares_must_sum_to_one(self):
+        with self.assertRaises(ValueError):
+            StepBudget(8.0, shares={'plan': 0.9})
+        with self.assertRaises(ValueError):
+            StepBudget(8.0, shares={'thinking': 0.4})
+
+    def test_overruns_degrade_in_order_and_recover(self):
+        scheduler = DeadlineScheduler(StepBudget(1.0), recover_after=2)
+
+        # Every overrun (even within one step) gives up the next degradation
+        scheduler.start_step()
+        scheduler.end_stage('ocr', 0.5)   # budget 0.2
+        scheduler.end_stage('plan', 0.5)  # budget 0.4
+        record = scheduler.end_step()
+
+        self.assertEqual(record['level'], 2)
+        self.assertEqual([d['degradation'] for d in record['decisions']], list(DEGRADATIONS[:2]))
+        self.assertEqual(scheduler.ocr_resize(), 0.5)
+        self.assertTrue(scheduler.active('skip_vlm'))
+        self.assertIsNone(scheduler.model())
+
+        for _ in range(2):
+            scheduler.start_step()
+            scheduler.end_stage('ocr', 0.01)
+            record = scheduler.end_step()
+
+        self.assertEqual(record['level'], 1)
+        self.assertEqual(record['decisions'][0]['kind'], 'recover')
+        self.assertFalse(scheduler.active('skip_vlm'))
+        self.assertEqual(len(scheduler.decisions), 3)
+
+    def test_exhausted_and_short_settle(self):
+        scheduler = DeadlineScheduler(StepBudget(1.0))
+        scheduler.start_step()
+        for _ in range(len(DEGRADATIONS) + 1):
+            scheduler.end_stage('capture', 0.5)
+
+        self.assertEqual(scheduler.model(), "gpt-4o-mini")
+        self.assertEqual(scheduler.decisions[-1]['kind'], 'exhausted')
+        # Further overruns are counted, not logged, and keep the step from counting as clean
+        scheduler.end_stage('capture', 0.5)
+        self.assertEqual(scheduler.exhausted, 2)
+        self.assertEqual([d['kind'] for d in scheduler.decisions].count('exhausted'), 1)
+        for _ in range(scheduler.recover_after):
+            scheduler.start_step()
+            scheduler.end_stage('capture', 0.5)
+            self.assertEqual(scheduler.end_step()['exhausted'], 1)
+        self.assertEqual(scheduler.level, len(DEGRADATIONS))
+        self.assertEqual([d['kind'] for d in scheduler.decisions].count('exhausted'), 1)
+        # Step is already past its deadline, so the settle wait is cut to zero
+        with patch('core.budget.time.time', return_value=scheduler._step_start + 1.5):
+            self.assertEqual(scheduler.settle_time(2.0), 0.0)
+
+    def test_vlm_skipped_when_step_is_nearly_out_of_time(self):
+        scheduler = DeadlineScheduler(StepBudget(1.0))
+        scheduler.start_step()
+        self.assertTrue(scheduler.allow_vlm())
+
+        # 0.95s in: less than the 0.1s locate share is left, though no degradation is active
+        with patch('core.budget.time.time', return_value=scheduler._step_start + 0.95):
+            self.assertFalse(scheduler.allow_vlm())
+        self.assertEqual(scheduler.level, 0)
+        self.assertEqual(scheduler.end_step()['decisions'][0]['kind'], 'skip')
+
+class TestBudgetedLoop(unittest.TestCase):
+
+    def test_over_budget_step_skips_vlm_fallback(self):
+        desktop = build_demo_desktop()
+        script = [{"thought": "t", "action": "click", "target_text": "Nowhere"}]
+        budget = StepBudget(0.6, shares={'capture': 0.2, 'ocr': 0.3, 'plan': 0.2, 'locate': 0.15, 'settle': 0.15})
+        agent = build_sim_agent(desktop, script=script, llm_latency=0.6, budget=budget)
+
+        with patch.object(agent.perception, 'estimate_coordinates_with_vlm') as mock_vlm:
+            steps = agent.run("Budget test", max_steps=1)
+            mock_vlm.assert_not_called()
+
+        # Only the first degradation is on; the skip comes from the step's own deadline
+        self.assertEqual(steps[0]['budget']['level'], 1)
+        kinds = [d['kind'] for d in steps[0]['budget']['decisions']]
+        self.assertEqual(kinds, ['degrade', 'skip'])
+
+    def test_slow_steps_degrade_the_loop(self):
+        desktop = build_demo_desktop()
+        agent = build_sim_agent(desktop, llm_latency=0.03, budget=StepBudget(0.02))
+
+        with patch.object(agent.perception, 'estimate_coordinates_with_vlm') as mock_vlm:
+            steps = agent.run("Budget test", max_steps=7)
+            agent.execute_plan({"action": "click", "target_text": "Nowhere"}, [], None)
+            mock_vlm.assert_not_called()
+
+        # Planning overruns every step: downscale OCR, skip VLM, then the cheap model
+        kinds = [d['degradation'] for step in steps for d in step['budget']['decisions']]
+        self.assertEqual(kinds[:3], list(DEGRADATIONS[:3]))
+        self.assertIn("gpt-4o-mini", agent.brain.client.models)
+        # Downscaled OCR still maps clicks onto the right widgets
+        self.assertIn(('click', 'Dark Mode'), desktop.events)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+import threading
+import time
+import numpy as np
+from unittest.mock import MagicMock, patch
+import core.retina as retina
+from core.vision import Eye, PerceptionEngine
+from core.pool import OCRPool
+from core.simulator import ScriptedLLMClient, SilentVoice
+from core.brain import Planner
+from main import OmniAgent
+
+# A 2x laptop panel (1440x900 points) with a 1x monitor to its left
+MONITORS = [
+    {'left': -1920, 'top': 0, 'width': 3360, 'height': 1080},  # mss index 0: union of all
+    {'left': 0, 'top': 0, 'width': 1440, 'height': 900},
+    {'left': -1920, 'top': 0, 'width': 1920, 'height': 1080},
+]
+SCALES = {(0, 0, 1440, 900): 2.0, (-1920, 0, 1920, 1080): 1.0}
+
+class FakeMSS:
+    instances = []
+
+    def __init__(self, display=None):
+        self.monitors = MONITORS
+        self.threads = set()
+        FakeMSS.instances.append(self)
+
+    def grab(self, monitor):
+        self.threads.add(threading.get_ident())
+        scale = SCALES[(monitor['left'], monitor['top'], monitor['width'], monitor['height'])]
+        # BGRA at the display's physical size, so the OCR stub can tell them apart
+        return np.full((int(monitor['height'] * scale), int(monitor['width'] * scale), 4), 255, dtype=np.uint8)
+
+def box(x, y):
+    return [[x - 20, y - 10], [x + 20, y - 10], [x + 20, y + 10], [x - 20, y + 10]]
+
+class DisplayOCR:
+    # Physical-pixel OCR results per display, keyed by image width
+    RESULTS = {
+        2880: [[box(200, 100), ('Inbox', 0.99)]],
+        1920: [[box(960, 540), ('Deploy', 0.98)]],
+    }
+
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def scan(self, image):
+        with self.lock:
+            self.active.append(1)
+            self.peak.append(len(self.active))
+        time.sleep(0.02)
+        with self.lock:
+            self.active.pop()
+        return self.RESULTS[image.shape[1]]
+
+def display_scale(key):
+    return SCALES[key]
+
+class TestDisplays(unittest.TestCase):
+
+    def setUp(self):
+        FakeMSS.instances = []
+        DisplayOCR.peak = []
+        retina.clear_scale_cache()
+        patcher = patch('core.vision.mss', MagicMock(mss=FakeMSS))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch('core.retina._display_scale_backend', side_effect=display_scale)
+        self.backend = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(retina.clear_scale_cache)
+
+    def test_scale_is_cached_per_display(self):
+        self.assertEqual(retina.get_display_scale(MONITORS[1]), 2.0)
+        self.assertEqual(retina.get_display_scale(MONITORS[1]), 2.0)
+        self.assertEqual(retina.get_display_scale(MONITORS[2]), 1.0)
+        self.assertEqual(self.backend.call_count, 2)
+
+    def test_capture_all_grabs_each_display_on_its_own_handle(self):
+        eye = Eye()
+        displays = eye.capture_all()
+
+        self.assertEqual([d['index'] for d in displays], [1, 2])
+        self.assertEqual(displays[0]['image'].shape, (1800, 2880, 3))
+        self.assertEqual(displays[1]['origin'], (-1920, 0))
+        self.assertEqual([d['scale'] for d in displays], [2.0, 1.0])
+        # The grabs ran on worker threads with their own mss handles, not eye.sct
+        self.assertEqual(eye.sct.threads, set())
+        self.assertTrue(all(len(sct.threads) == 1 for sct in FakeMSS.instances[1:]))
+
+        self.assertEqual([d['index'] for d in eye.capture_all([2])], [2])
+
+    def test_scan_displays_maps_to_global_logical_coordinates(self):
+        engine = PerceptionEngine(ocr=OCRPool(2, factory=DisplayOCR), scale_factor=2.0)
+        displays = Eye().capture_all()
+
+        elements = engine.scan_displays(displays)
+
+        by_text = {e['text']: e for e in elements}
+        self.assertEqual(by_text['Inbox']['center'], (100, 50))  # 2x: physical / 2
+        self.assertEqual(by_text['Deploy']['center'], (-960, 540))  # 1x, left of the primary
+        self.assertEqual(by_text['Deploy']['display'], 2)
+        # Both displays were OCR'd at once
+        self.assertEqual(max(DisplayOCR.peak), 2)
+
+    def test_agent_clicks_on_secondary_display(self):
+        hand = MagicMock()
+        llm = ScriptedLLMClient([{"thought": "t", "action": "click", "target_text": "Deploy"}], loop=False)
+        agent = OmniAgent(
+            eye=Eye(),
+            perception=PerceptionEngine(ocr=OCRPool(2, factory=DisplayOCR), scale_factor=2.0, llm_client=llm),
+            brain=Planner(client=llm),
+            hand=hand,
+            voice=SilentVoice(),
+            settle_time=0.0,
+            displays="all"
+        )
+
+        steps = agent.run("Deploy", max_steps=2)
+
+        self.assertEqual([s['action'] for s in steps], ['click', 'done'])
+        hand.click.assert_called_once_with(-960, 540)
+
+if __name__ == '__main__':
+    unittest.main()
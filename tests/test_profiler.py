@@ -0,0 +1,81 @@
+import os
+import json
+import tempfile
+import unittest
+import threading
+import tracemalloc
+from unittest.mock import patch
+from core.profiler import StepProfiler
+from simulate import build_sim_agent
+
+class TestProfiler(unittest.TestCase):
+
+    def test_disabled_profiler_writes_nothing(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            agent = build_sim_agent()
+            agent.profiler = StepProfiler(output_dir=tmp)
+
+            steps = agent.run("Profile test", max_steps=3)
+
+            self.assertEqual(os.listdir(tmp), [])
+            self.assertFalse(any('profile' in step for step in steps))
+            self.assertFalse(tracemalloc.is_tracing())
+
+    def test_profiles_selected_steps(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            # LLM latency gives the sampler something to catch in the plan stage
+            agent = build_sim_agent(llm_latency=0.05)
+            agent.profiler = StepProfiler(output_dir=tmp, interval=0.002)
+            agent.profiler.enable(steps=[2])
+
+            steps = agent.run("Profile test", max_steps=3)
+
+            self.assertEqual(sorted(os.listdir(tmp)), ['step_0002.folded', 'step_0002_memory.json'])
+            self.assertIn('profile', steps[1])
+            self.assertNotIn('profile', steps[0])
+            # tracemalloc is only on for the profiled step
+            self.assertFalse(tracemalloc.is_tracing())
+
+            with open(os.path.join(tmp, 'step_0002.folded')) as f:
+                lines = f.read().splitlines()
+            plan_lines = [line for line in lines if line.startswith('plan;')]
+            self.assertTrue(plan_lines)
+            self.assertTrue(any('decide_next_step (brain.py:' in line for line in plan_lines))
+            self.assertTrue(all(line.rsplit(' ', 1)[1].isdigit() for line in lines))
+            # Only in-stage samples, and none of the profiler's own snapshot work
+            stages = ('capture;', 'ocr;', 'plan;', 'locate;', 'settle;', 'verify;')
+            self.assertTrue(all(line.startswith(stages) for line in lines))
+            self.assertFalse(any(' (profiler.py:' in line or ' (tracemalloc.py:' in line for line in lines))
+
+            with open(os.path.join(tmp, 'step_0002_memory.json')) as f:
+                report = json.load(f)
+            self.assertEqual(set(report['stages']), {'capture', 'ocr', 'plan', 'locate', 'settle', 'verify'})
+            # The capture stage copies a full frame
+            self.assertGreater(report['stages']['capture']['peak'], 1280 * 800 * 3)
+            self.assertGreaterEqual(report['peak'], report['stages']['capture']['peak'])
+
+    def test_toggle_keeps_selection(self):
+        profiler = StepProfiler()
+        profiler.enable(every=5)
+        profiler.toggle()
+        self.assertFalse(profiler.wants(5))
+        profiler.toggle()
+        self.assertTrue(profiler.wants(10))
+        self.assertFalse(profiler.wants(11))
+
+    def test_failed_step_stops_sampling_and_tracing(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            agent = build_sim_agent()
+            agent.profiler = StepProfiler(output_dir=tmp)
+            agent.profiler.enable()
+
+            with patch.object(agent.brain, 'decide_next_step', side_effect=RuntimeError("boom")):
+                with self.assertRaises(RuntimeError):
+                    agent.run("Profile test", max_steps=3)
+
+            self.assertFalse(tracemalloc.is_tracing())
+            self.assertNotIn("stack-sampler", [t.name for t in threading.enumerate()])
+            self.assertEqual(os.listdir(tmp), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+from unittest.mock import patch
+from core.simulator import build_demo_desktop, SimOCR
+from core.vision import PerceptionEngine
+from simulate import build_sim_agent
+
+INBOX = (900, 500)  # A point inside the demo desktop's scrolling Inbox
+
+def key(elements):
+    return sorted((e['text'], e['center']) for e in elements)
+
+class TestIncrementalScroll(unittest.TestCase):
+
+    def test_incremental_scan_matches_full_scan(self):
+        for scale in (1.0, 2.0):
+            desktop = build_demo_desktop(scale_factor=scale)
+            ocr = SimOCR(desktop)
+            engine = PerceptionEngine(ocr=ocr, scale_factor=scale)
+            prev = desktop.render().copy()
+            elements = engine.scan_full(prev)
+
+            for clicks in (-3, -1, -5, 2, 3):
+                desktop.scroll(clicks, *INBOX)
+                image = desktop.render().copy()
+                with patch.object(ocr, 'scan', wraps=ocr.scan) as full_scan:
+                    elements = engine.scan_after_scroll(prev, image, elements, clicks=clicks)
+                    full_scan.assert_not_called()
+                self.assertEqual(key(elements), key(engine.scan_full(image)), f"scale {scale}, clicks {clicks}")
+                prev = image
+
+            # Page cache follows the Inbox exactly: 9 clicks down, 5 up
+            self.assertEqual(engine.page.scroll_y, desktop.find_window("Inbox").offset)
+            self.assertEqual(engine.page.pixels_per_click, 40)
+
+    def test_incremental_scan_honours_ocr_downscale(self):
+        desktop = build_demo_desktop(scale_factor=2.0)
+        ocr = SimOCR(desktop)
+        engine = PerceptionEngine(ocr=ocr, scale_factor=2.0)
+        prev = desktop.render().copy()
+        elements = engine.scan_full(prev)
+
+        desktop.scroll(-3, *INBOX)
+        image = desktop.render().copy()
+        with patch.object(ocr, 'scan_region', wraps=ocr.scan_region) as scan_region:
+            elements = engine.scan_after_scroll(prev, image, elements, clicks=-3, resize=0.5)
+            self.assertEqual(scan_region.call_args[0][0].shape, (800, 1280, 3))
+        self.assertEqual(key(elements), key(engine.scan_full(image, resize=0.5)))
+
+    def test_page_cache_remembers_scrolled_off_elements(self):
+        desktop = build_demo_desktop()
+        engine = PerceptionEngine(ocr=SimOCR(desktop), scale_factor=1.0)
+        prev = desktop.render().copy()
+        elements = engine.scan_full(prev)
+
+        desktop.scroll(-5, *INBOX)
+        image = desktop.render().copy()
+        elements = engine.scan_after_scroll(prev, image, elements, clicks=-5)
+
+        self.assertIsNone(engine.find_element_in_list(elements, 'Message 01'))
+        entry = engine.page.locate('Message 01')
+        self.assertIsNotNone(entry)
+        # Static widgets next to the list are not part of the page
+        self.assertIsNone(engine.page.locate('Save'))
+
+        desktop.scroll(engine.page.clicks_to_reveal(entry), *INBOX)
+        elements = engine.scan_full(desktop.render())
+        self.assertIsNotNone(engine.find_element_in_list(elements, 'Message 01'))
+
+class TestScrollingAgent(unittest.TestCase):
+
+    def test_agent_scrolls_down_and_back_to_offscreen_target(self):
+        seen = []
+
+        def click_first_message(messages):
+            seen.append(messages[-1]['content'])
+            return {"thought": "It was near the top.", "action": "click", "target_text": "Message 01"}
+
+        script = [
+            {"thought": "Look further down.", "action": "scroll", "scroll_direction": "down",
+             "scroll_amount": 5, "target_text": "Message 00"},
+            {"thought": "Keep going.", "action": "scroll", "scroll_direction": "down", "scroll_amount": 5},
+            click_first_message,
+            {"thought": "Opened it.", "action": "done"},
+        ]
+        desktop = build_demo_desktop()
+        agent = build_sim_agent(desktop, script=script)
+
+        steps = agent.run("Open the first message", max_steps=4)
+
+        self.assertEqual([s['action'] for s in steps], ['scroll', 'scroll', 'click', 'done'])
+        self.assertIn("SCROLLED OUT OF VIEW", seen[0])
+        self.assertIn("Message 01", seen[0].split("SCROLLED OUT OF VIEW")[1])
+        clicked = [label for kind, label in desktop.events if kind == 'click']
+        self.assertTrue(clicked[-1].startswith('Message 01'))
+        # Clicking leaves the page, so the cache starts over
+        self.assertEqual(agent.perception.page.entries, [])
+
+    def test_scroll_back_after_hitting_the_bottom(self):
+        # The last scroll is clamped at the end of the list; it must not skew the rate
+        script = [{"thought": "Down.", "action": "scroll", "scroll_direction": "down",
+                   "scroll_amount": 5, "target_text": "Message 00"}] * 4 + [
+            {"thought": "Open it.", "action": "click", "target_text": "Message 10"},
+            {"thought": "Opened it.", "action": "done"},
+        ]
+        desktop = build_demo_desktop()
+        agent = build_sim_agent(desktop, script=script)
+
+        with patch.object(agent.perception, 'estimate_coordinates_with_vlm') as mock_vlm:
+            agent.run("Open message 10", max_steps=6)
+            mock_vlm.assert_not_called()
+
+        self.assertEqual(agent.perception.page.pixels_per_click, 40)
+        clicked = [label for kind, label in desktop.events if kind == 'click']
+        self.assertTrue(clicked[-1].startswith('Message 10'))
+        # One scroll back up was enough
+        self.assertEqual(len([e for e in desktop.events if e[0] == 'scroll']), 5)
+
+    def test_unparseable_scroll_amount_falls_back_to_default(self):
+        desktop = build_demo_desktop()
+        agent = build_sim_agent(desktop)
+        plan = {"thought": "t", "action": "scroll", "scroll_direction": "down",
+                "scroll_amount": "three", "target_text": "Message 00"}
+
+        self.assertFalse(agent.execute_plan(plan, agent.perception.scan_full(desktop.render()), None))
+        self.assertEqual(desktop.events, [('scroll', -3)])
+
+if __name__ == '__main__':
+    unittest.main()
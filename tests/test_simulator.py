@@ -0,0 +1,58 @@
+import unittest
+import numpy as np
+from core.simulator import build_demo_desktop, SimOCR, ScriptedLLMClient
+from core.vision import PerceptionEngine
+from simulate import build_sim_agent, summarize
+
+class TestSimulator(unittest.TestCase):
+
+    def test_click_updates_frame_and_state(self):
+        desktop = build_demo_desktop()
+        before = desktop.render().copy()
+
+        hit = desktop.click(150, 135)  # 'File' button
+
+        self.assertEqual(hit.label, 'File')
+        self.assertEqual(hit.clicks, 1)
+        self.assertFalse(np.array_equal(before, desktop.render()))
+        self.assertEqual(desktop.events, [('click', 'File')])
+
+    def test_ocr_ground_truth_maps_back_to_widgets(self):
+        # On a 2x display the OCR boxes are physical; the engine must hand back
+        # logical centers that land on the right widget.
+        desktop = build_demo_desktop(scale_factor=2.0)
+        self.assertEqual(desktop.render().shape, (1600, 2560, 3))
+
+        engine = PerceptionEngine(ocr=SimOCR(desktop), scale_factor=2.0)
+        elements = engine.scan_full(desktop.render())
+        x, y = engine.find_element_in_list(elements, 'Search')
+        desktop.click(x, y)
+        desktop.type_text('hello')
+
+        texts = [e['text'] for e in engine.scan_full(desktop.render())]
+        self.assertIn('Search: hello', texts)
+
+    def test_scripted_llm_stops_when_not_looping(self):
+        client = ScriptedLLMClient([{"thought": "t", "action": "click", "target_text": "File"}], loop=False)
+        tools = [{"type": "function"}]
+
+        self.assertIn('"click"', client.query([], tools=tools))
+        self.assertIn('"done"', client.query([], tools=tools))
+
+    def test_agent_loop_runs_headless(self):
+        desktop = build_demo_desktop()
+        agent = build_sim_agent(desktop)
+
+        steps = agent.run("Load test", max_steps=7)
+
+        self.assertEqual(len(steps), 7)
+        self.assertIn(('type', 'hello'), desktop.events)
+        self.assertIn(('click', 'Dark Mode'), desktop.events)
+        self.assertFalse(desktop.find_window("Settings").visible)
+
+        report = summarize(steps, elapsed=1.0)
+        self.assertEqual(report['steps'], 7)
+        self.assertIn('p95', report['latency']['total'])
+
+if __name__ == '__main__':
+    unittest.main()